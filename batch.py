@@ -0,0 +1,185 @@
+"""batch.py
+solve a board from every starting square across a pool of processes
+input: board size and tour type
+output: a tour (or a failure) and the time taken for each starting square
+
+run as a command it solves a stream of jobs instead, one JSON object per
+line from a file or stdin, and writes one JSON result line per job as each
+one finishes:
+
+    {"rows": 8, "cols": 8, "start": [0, 0], "closed": true, "timeout": 5}
+
+jobs may also give "max_nodes", "strategy" and any other fields such as an
+"id", which are copied into the result. results carry the "status", the
+"tour" when one was found, the "length" of the longest path, "nodes" and
+"seconds". only a fixed number of jobs are in flight at once, so memory
+stays flat however long the input is.
+
+    python batch.py jobs.jsonl --processes 8 > results.jsonl
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from knight import Knight
+
+
+def solve_start(job):
+    """solve a single (rows, cols, start, closed, strategy, timeout) job, runs in a worker"""
+    rows, cols, start, closed, strategy, timeout = job
+    began = time.perf_counter()
+    knight = Knight(rows, cols, strategy=strategy)
+    knight.set_start_position(*start)
+    solved = knight.solve_closed_tour(timeout) if closed else knight.solve(timeout)
+    return {
+        'start': start,
+        'solved': bool(solved),
+        'status': solved.status,
+        'tour': list(knight.board.moves) if solved else None,
+        'seconds': time.perf_counter() - began,
+    }
+
+
+def iter_all_starts(rows, cols, closed=False, processes=None, strategy=None, timeout=None):
+    """solve from every starting square, yielding each result as it finishes
+
+    processes defaults to the number of cpus. strategy is passed on to
+    Knight, so it must be a strategy name or a picklable strategy object.
+    timeout is the budget in seconds for each start, a start that runs
+    out of it comes back unsolved with the status 'timeout'
+    """
+    jobs = [(rows, cols, (x, y), closed, strategy, timeout) for x in range(rows) for y in range(cols)]
+    with multiprocessing.Pool(processes) as pool:
+        # one start per task so a slow start never holds up a queue of fast ones
+        yield from pool.imap_unordered(solve_start, jobs, chunksize=1)
+
+
+def solve_all_starts(rows, cols, closed=False, processes=None, strategy=None, timeout=None):
+    """solve from every starting square and return the results keyed by start"""
+    return {result['start']: result
+            for result in iter_all_starts(rows, cols, closed, processes, strategy, timeout)}
+
+
+def solve_job(job, tours=True):
+    """solve one job dict from the command line, runs in a worker
+
+    returns the result fields, or an 'error' for a job that makes no sense
+    """
+    try:
+        knight = Knight(int(job['rows']), int(job['cols']), strategy=job.get('strategy'))
+        start = job.get('start', (0, 0))
+        if not knight.set_start_position(*start):
+            return {'error': f"start {start} is not on the board"}
+        if job.get('closed'):
+            result = knight.solve_closed_tour(job.get('timeout'), job.get('max_nodes'))
+        else:
+            result = knight.solve(job.get('timeout'), job.get('max_nodes'))
+    except (KeyError, TypeError, ValueError) as error:
+        return {'error': f"{type(error).__name__}: {error}"}
+    output = {
+        'status': result.status,
+        'length': len(result.path),
+        'nodes': result.nodes,
+        'seconds': result.seconds,
+    }
+    if result and tours:
+        output['tour'] = result.path
+    return output
+
+
+def submit_job(pool, new_pool, fn, *args):
+    """submit fn(*args) to pool, returns (pool, future)
+
+    a worker that dies (e.g. killed for running out of memory) breaks the
+    whole pool. the jobs that were in flight fail with it, and this job
+    goes to a fresh pool from new_pool(), which is handed back in its place
+    """
+    try:
+        return pool, pool.submit(fn, *args)
+    except BrokenProcessPool:
+        pool.shutdown(wait=False)
+        pool = new_pool()
+        return pool, pool.submit(fn, *args)
+
+
+def _finish(job, future):
+    """the job's own fields with its result added"""
+    try:
+        return {**job, **future.result()}
+    except Exception as error:
+        # the worker itself died, e.g. ran out of memory
+        return {**job, 'error': f"{type(error).__name__}: {error}"}
+
+
+def run_jobs(lines, processes=None, window=None, tours=True):
+    """solve JSONL job lines across a process pool, yielding each result as
+    it finishes
+
+    at most window jobs (four per process by default) are read ahead and
+    in flight at any time. each result has the 'line' its job came from.
+    when a dead worker breaks the pool (see submit_job) the jobs that were
+    in flight get an 'error' and the rest carry on in a new pool
+    """
+    processes = processes or multiprocessing.cpu_count()
+    window = window or 4 * processes
+    pool = ProcessPoolExecutor(processes)
+    try:
+        pending = {}
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as error:
+                yield {'line': number, 'error': f"bad JSON: {error}"}
+                continue
+            if not isinstance(job, dict):
+                yield {'line': number, 'error': "a job has to be a JSON object"}
+                continue
+            job['line'] = number
+            pool, future = submit_job(pool, lambda: ProcessPoolExecutor(processes),
+                                      solve_job, job, tours)
+            pending[future] = job
+
+            if len(pending) >= window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _finish(pending.pop(future), future)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _finish(pending.pop(future), future)
+    finally:
+        pool.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve knight's tour jobs from JSONL, one result line per job")
+    parser.add_argument('jobs', nargs='?', default='-', help="JSONL file of jobs, - for stdin (the default)")
+    parser.add_argument('--output', '-o', default='-', help="where to write the results, - for stdout")
+    parser.add_argument('--processes', '-p', type=int, help="worker processes (default: one per cpu)")
+    parser.add_argument('--window', type=int, help="most jobs in flight at once (default: 4 per process)")
+    parser.add_argument('--no-tours', dest='tours', action='store_false', help="leave the tours out of the results")
+    args = parser.parse_args(argv)
+
+    jobs = sys.stdin if args.jobs == '-' else open(args.jobs)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for result in run_jobs(jobs, args.processes, args.window, args.tours):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if jobs is not sys.stdin:
+            jobs.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""bench.py
+benchmark the solver engines across board sizes, start squares and tour types
+input: which engines and boards to run, optional baseline files
+output: wall time, nodes per second, backtracks and peak memory for each case
+
+the engines are knight.py with its board backends and strategies, plus the
+older solvers in knight-claude-v1.py and knight-manhattan.py. nodes and
+backtracks are counted the same way for all of them, as calls to the
+board's move and undo_move, and every run is cut off after a node cap or a
+time limit so the slow engines finish too.
+
+    python bench.py --save baseline.json
+    python bench.py --compare baseline.json
+
+--compare exits with status 1 if any case got slower than the threshold or
+changed its node count or outcome.
+
+    python bench.py --linear 1000
+
+--linear runs every strategy's no-backtrack mode once over a big board
+from a corner, an edge and the centre, and exits with status 1 if any of
+them gives up. 'random' is left out, its ties change from run to run.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from bitboard import BitBoard
+from knight import STRATEGIES, Knight
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BOARDS = [(5, 5), (6, 6), (8, 8), (7, 8), (10, 10), (12, 9)]
+QUICK_BOARDS = [(5, 5), (6, 6), (8, 8)]
+
+
+class Cutoff(Exception):
+    """raised inside a run that went over its node cap or time limit"""
+
+
+def _load_script(name):
+    """import one of the hyphenated scripts next to this file as a module"""
+    module_name = name.replace('-', '_')
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(HERE, name + '.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return sys.modules[module_name]
+
+
+def _knight_engine(**options):
+    """an engine built on knight.Knight with the given options"""
+    def make(rows, cols, start, closed):
+        knight = Knight(rows, cols, **options)
+        knight.set_start_position(*start)
+        return knight.board, knight.solve_closed_tour if closed else knight.solve
+    return make
+
+
+def _claude_v1(rows, cols, start, closed):
+    knight = _load_script('knight-claude-v1').Knight(rows, cols, *start)
+    return knight.board, lambda: knight.solve(tour=closed)
+
+
+def _manhattan(rows, cols, start, closed):
+    # it always starts in the corner and has no closed tour mode
+    if start != (0, 0) or closed:
+        return None
+    knight = _load_script('knight-manhattan').Knight(rows, cols)
+    return knight.board, knight.solve
+
+
+ENGINES = {
+    'knight': _knight_engine(),
+    'bitboard': _knight_engine(board_cls=BitBoard),
+    'pohl': _knight_engine(strategy='pohl'),
+    'roth': _knight_engine(strategy='roth'),
+    'fixed-order': _knight_engine(strategy='fixed-order'),
+    'prune': _knight_engine(prune=True),
+    'claude-v1': _claude_v1,
+    'manhattan': _manhattan,
+}
+
+
+def starts(rows, cols):
+    """the start squares every board is run from"""
+    return {'corner': (0, 0), 'edge': (0, cols // 2), 'centre': (rows // 2, cols // 2)}
+
+
+def cases(boards):
+    """(rows, cols, start label, start, closed) for every case on the boards
+
+    closed tours need an even number of squares, the only odd board that
+    asks for one is 5x5, as a case where the whole tree is searched
+    """
+    for rows, cols in boards:
+        for label, start in starts(rows, cols).items():
+            yield rows, cols, label, start, False
+            if (rows * cols) % 2 == 0 or (rows, cols) == (5, 5):
+                yield rows, cols, label, start, True
+
+
+def _count(board, counts, max_nodes, deadline):
+    """wrap a board's move and undo_move so every call is counted"""
+    move, undo_move = board.move, board.undo_move
+
+    def counted_move(*args):
+        counts['nodes'] += 1
+        if counts['nodes'] > max_nodes or (not counts['nodes'] & 1023 and time.perf_counter() > deadline):
+            raise Cutoff
+        return move(*args)
+
+    def counted_undo(*args):
+        counts['backtracks'] += 1
+        return undo_move(*args)
+
+    board.move = counted_move
+    board.undo_move = counted_undo
+
+
+def _run(make, rows, cols, start, closed, max_nodes, time_limit):
+    """one run of an engine, returns (status, seconds, counts) or None if it
+    does not support the case"""
+    made = make(rows, cols, start, closed)
+    if made is None:
+        return None
+    board, solve = made
+    counts = {'nodes': 0, 'backtracks': 0}
+    began = time.perf_counter()
+    _count(board, counts, max_nodes, began + time_limit)
+    try:
+        # the older engines print as they search
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            status = 'solved' if solve() else 'no tour'
+    except Cutoff:
+        status = 'cut off'
+    except RecursionError:
+        status = 'recursion limit'
+    return status, time.perf_counter() - began, counts
+
+
+def run_case(engine, rows, cols, start, closed, max_nodes=200000, time_limit=5.0, repeat=3):
+    """benchmark one engine on one case
+
+    the wall time is the best of repeat runs, peak memory comes from one
+    more run under tracemalloc since tracing slows everything down
+    """
+    make = ENGINES[engine]
+    result = _run(make, rows, cols, start, closed, max_nodes, time_limit)
+    if result is None:
+        return None
+    status, seconds, counts = result
+    if status == 'solved' or status == 'no tour':
+        # runs that were cut off are not worth repeating
+        for _ in range(repeat - 1):
+            seconds = min(seconds, _run(make, rows, cols, start, closed, max_nodes, time_limit)[1])
+
+    tracemalloc.start()
+    try:
+        _run(make, rows, cols, start, closed, max_nodes, time_limit)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': status,
+        'seconds': seconds,
+        'nodes': counts['nodes'],
+        'backtracks': counts['backtracks'],
+        'nodes_per_sec': counts['nodes'] / seconds if seconds else 0.0,
+        'peak_kb': peak / 1024,
+    }
+
+
+def case_name(engine, rows, cols, label, closed):
+    return f"{engine} {rows}x{cols} {label} {'closed' if closed else 'open'}"
+
+
+def run_suite(engines, boards, max_nodes=200000, time_limit=5.0, repeat=3, report=print):
+    """run every engine over every case, returns the results keyed by case name"""
+    results = {}
+    for rows, cols, label, start, closed in cases(boards):
+        for engine in engines:
+            result = run_case(engine, rows, cols, start, closed, max_nodes, time_limit, repeat)
+            if result is None:
+                continue
+            name = case_name(engine, rows, cols, label, closed)
+            results[name] = result
+            report(f"{name:<36} {result['status']:<15} {result['seconds']:>9.4f}s "
+                   f"{result['nodes']:>8} nodes {result['nodes_per_sec']:>10.0f}/s "
+                   f"{result['backtracks']:>8} backtracks {result['peak_kb']:>9.1f}KB")
+    return results
+
+
+def compare(results, baseline, threshold=0.25, noise=0.005):
+    """the cases that got worse against a baseline, as readable lines
+
+    a case regresses when its time grows by more than threshold (and by more
+    than noise seconds), or when its outcome or node count changes, which
+    means the search itself behaves differently
+    """
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            problems.append(f"{name}: {base['status']} -> {result['status']}")
+        elif result['nodes'] != base['nodes'] and result['status'] != 'cut off':
+            problems.append(f"{name}: {base['nodes']} -> {result['nodes']} nodes")
+        elif (result['seconds'] > base['seconds'] * (1 + threshold)
+                and result['seconds'] - base['seconds'] > noise):
+            problems.append(f"{name}: {base['seconds']:.4f}s -> {result['seconds']:.4f}s "
+                            f"({result['seconds'] / base['seconds'] - 1:+.0%})")
+    return problems
+
+
+def check_linear(size, report=print):
+    """one linear pass of every deterministic strategy over a size x size
+    board, returns the ones that gave up as readable lines"""
+    problems = []
+    for label, start in starts(size, size).items():
+        for name in STRATEGIES:
+            if name == 'random':
+                continue
+            knight = Knight(size, size, strategy=STRATEGIES[name](backtrack=False))
+            knight.set_start_position(*start)
+            result = knight.solve()
+            report(f"{name:<14} {size}x{size} {label:<7} {result.status:<8} "
+                   f"{len(result.path):>9} squares {result.seconds:>8.1f}s")
+            if not result:
+                problems.append(f"{name} {size}x{size} {label}: {result.status} "
+                                f"after {len(result.path)} squares")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the knight's tour solvers")
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help="comma separated engines to run (default: all)")
+    parser.add_argument('--boards', help="comma separated board sizes such as 8x8,7x8")
+    parser.add_argument('--quick', action='store_true', help="only the small boards")
+    parser.add_argument('--max-nodes', type=int, default=200000, help="node cap for a single run")
+    parser.add_argument('--time-limit', type=float, default=5.0, help="seconds allowed for a single run")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case, the best time is kept")
+    parser.add_argument('--save', help="write the results to this JSON file as a baseline")
+    parser.add_argument('--compare', help="flag regressions against this JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown that counts as a regression (default 0.25 = 25%%)")
+    parser.add_argument('--linear', type=int, metavar='SIZE',
+                        help="only check that the linear strategies finish a SIZE x SIZE board")
+    args = parser.parse_args(argv)
+
+    if args.linear:
+        problems = check_linear(args.linear)
+        for problem in problems:
+            print(f"GAVE UP {problem}")
+        return 1 if problems else 0
+
+    engines = args.engines.split(',')
+    for engine in engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine {engine!r}, choose from {', '.join(ENGINES)}")
+    if args.boards:
+        boards = [tuple(int(side) for side in size.split('x')) for size in args.boards.split(',')]
+    else:
+        boards = QUICK_BOARDS if args.quick else BOARDS
+
+    results = run_suite(engines, boards, args.max_nodes, args.time_limit, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'max_nodes': args.max_nodes,
+                'time_limit': args.time_limit,
+                'results': results,
+            }, f, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        problems = compare(results, baseline, args.threshold)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        print(f"{len(problems)} regressions against {args.compare}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""board_canvas.py
+a knight's tour board drawn on a single Tk canvas
+
+every square is one rectangle, plus a label when the squares are big enough
+to read one, all created once when the board is. set_square only talks to
+Tk when a square's colour or label actually changes, so a frame costs time
+in proportion to what changed rather than to the size of the board.
+"""
+
+import tkinter as tk
+
+LIGHT_SQUARE = "#f0d9b5"
+DARK_SQUARE = "#b58863"
+
+
+class BoardCanvas:
+    def __init__(self, master, rows, cols, on_click=None, max_size=720,
+                 light=LIGHT_SQUARE, dark=DARK_SQUARE):
+        """draw an empty rows x cols board at most max_size pixels across
+
+        on_click(row, col) is called when a square is clicked
+        """
+        self.rows = rows
+        self.cols = cols
+        self.on_click = on_click
+        self.light = light
+        self.dark = dark
+        self.size = size = max(3, min(64, max_size // max(rows, cols)))
+        self.labelled = size >= 28
+
+        self.canvas = canvas = tk.Canvas(master, width=cols * size, height=rows * size,
+                                         highlightthickness=0)
+        outline = "#808080" if size >= 8 else ""
+        font = ("Helvetica", max(6, size // 6))
+        # per flat square index: canvas items and what they currently show
+        self.squares = []
+        self.labels = []
+        self.fills = []
+        self.texts = []
+        for row in range(rows):
+            for col in range(cols):
+                fill = self.base_colour(row, col)
+                self.squares.append(canvas.create_rectangle(
+                    col * size, row * size, (col + 1) * size, (row + 1) * size, fill=fill, outline=outline))
+                self.fills.append(fill)
+                if self.labelled:
+                    self.labels.append(canvas.create_text(
+                        col * size + size // 2, row * size + size - size // 6, text="", font=font))
+                self.texts.append("")
+        # created last so it is drawn over every square
+        self.knight = canvas.create_text(-size, -size, text="♞",
+                                         font=("Helvetica", max(6, size // 2), "bold"))
+        canvas.bind("<Button-1>", self._click)
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def destroy(self):
+        self.canvas.destroy()
+
+    def base_colour(self, row, col):
+        """the chess board colour of a square"""
+        return self.light if (row + col) % 2 == 0 else self.dark
+
+    def set_square(self, row, col, fill=None, text=""):
+        """show a square in fill (None for its plain colour) with a label
+
+        labels are dropped when the squares are too small to read them
+        """
+        square = row * self.cols + col
+        if fill is None:
+            fill = self.base_colour(row, col)
+        if self.fills[square] != fill:
+            self.fills[square] = fill
+            self.canvas.itemconfig(self.squares[square], fill=fill)
+        if self.labelled and self.texts[square] != text:
+            self.texts[square] = text
+            self.canvas.itemconfig(self.labels[square], text=text)
+
+    def move_knight(self, row, col):
+        """draw the knight on a square"""
+        size = self.size
+        self.canvas.coords(self.knight, col * size + size // 2, row * size + size // 2)
+
+    def hide_knight(self):
+        self.canvas.coords(self.knight, -self.size, -self.size)
+
+    def _click(self, event):
+        row, col = event.y // self.size, event.x // self.size
+        if self.on_click is not None and 0 <= row < self.rows and 0 <= col < self.cols:
+            self.on_click(row, col)
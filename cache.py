@@ -0,0 +1,237 @@
+"""cache.py
+a persistent on-disk store of solved knights tours
+
+tours are keyed by (rows, cols, start, closed), and found through the
+symmetry layer so one stored tour answers every start it can be mapped onto
+(see symmetry.lookup). the store is two files:
+an index, which is a fixed size open addressing hash table that is memory
+mapped so a lookup is a few struct reads, and a data file the tours are
+appended to in the packed format from packed.py. when either gets too full the least recently used entries are
+dropped and both files are rewritten.
+
+only one process can use a cache at a time, it holds a lock on path +
+'.lock' while the cache is open and a second SolutionCache on the same
+path raises BlockingIOError instead of corrupting it.
+"""
+
+import errno
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:  # not on windows, where caches go unlocked
+    fcntl = None
+
+from packed import decode, encode
+from symmetry import lookup
+
+MAGIC = b'KTC2'  # the last byte is the format version
+HEADER = struct.Struct('<4sIIQ')  # magic, slots, entries, next sequence number
+SLOT = struct.Struct('<HHHHBBxxQIQ')  # rows, cols, start, closed, used, offset, length, sequence
+NO_TOUR = 0xFFFFFFFF  # length recorded for a board proven to have no tour
+MIN_SLOTS = 8  # fewer and an eviction can't leave room for the next entry
+
+
+class SolutionCache:
+    def __init__(self, path, max_bytes=64 << 20, slots=1 << 16):
+        """open (or create) the cache stored at path and path + '.data'
+
+        max_bytes bounds the size of the data file and slots the number of
+        entries the index can hold (at least MIN_SLOTS), the least recently
+        used entries go first when either fills up
+        """
+        if slots < MIN_SLOTS:
+            raise ValueError(f"a cache needs at least {MIN_SLOTS} slots, not {slots}")
+        self.path = path
+        self.data_path = path + '.data'
+        self.max_bytes = max_bytes
+        self.slots = slots
+        self._index = None
+        self._lock = open(path + '.lock', 'a+b')
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise BlockingIOError(errno.EWOULDBLOCK, f"{path} is in use by another process") from None
+            self._open()
+        except BaseException:
+            self._lock.close()
+            raise
+
+    def _open(self):
+        """map the index file, creating empty files if there are none"""
+        if not os.path.exists(self.path):
+            self._create(self.path, self.slots)
+            open(self.data_path, 'wb').close()
+        self._index_file = open(self.path, 'r+b')
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
+        magic, self.slots, _, _ = HEADER.unpack_from(self._index, 0)
+        if magic != MAGIC:
+            self._index.close()
+            self._index_file.close()
+            if magic[:3] != MAGIC[:3]:
+                raise ValueError(f"{self.path} is not a knights tour cache")
+            # written by an older version, start again
+            self._index = None
+            os.remove(self.path)
+            self._open()
+            return
+        if self.slots < MIN_SLOTS:
+            self._index.close()
+            self._index_file.close()
+            self._index = None
+            raise ValueError(f"{self.path} has {self.slots} slots, a cache needs at least {MIN_SLOTS}")
+        self._data = open(self.data_path, 'a+b')
+
+    @staticmethod
+    def _create(path, slots):
+        """write an empty index with the given number of slots"""
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, slots, 0, 0))
+            f.truncate(HEADER.size + slots * SLOT.size)
+
+    def close(self):
+        """unmap the index, close the files and let other processes have the cache"""
+        self._close_files()
+        if not self._lock.closed:
+            self._lock.close()  # which releases the lock
+
+    def _close_files(self):
+        if self._index is not None:
+            self._index.close()
+            self._index_file.close()
+            self._data.close()
+            self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return HEADER.unpack_from(self._index, 0)[2]
+
+    def _find(self, index, rows, cols, start, closed):
+        """the slot of index holding the key, or the empty slot where it would go"""
+        start_x, start_y = start
+        slot = (((rows * 31 + cols) * 31 + start_x) * 31 + start_y) * 2 + closed
+        slot = (slot * 2654435761) % self.slots
+        while True:
+            offset = HEADER.size + slot * SLOT.size
+            entry = SLOT.unpack_from(index, offset)
+            if not entry[5] or entry[:5] == (rows, cols, start_x, start_y, closed):
+                return offset, entry
+            slot = (slot + 1) % self.slots
+
+    def get(self, rows, cols, start, closed=False):
+        """the cached tour as a list of moves, [] if the board is known to
+        have no tour from start, or None if nothing is cached"""
+        closed = int(closed)
+        return lookup(lambda square: self._read(rows, cols, square, closed),
+                      rows, cols, start, closed)
+
+    def _read(self, rows, cols, square, closed):
+        """the tour filed under exactly this key, which counts as a use"""
+        slot_offset, entry = self._find(self._index, rows, cols, square, closed)
+        if not entry[5]:
+            return None
+        magic, slot_count, count, sequence = HEADER.unpack_from(self._index, 0)
+        SLOT.pack_into(self._index, slot_offset, *entry[:8], sequence)
+        HEADER.pack_into(self._index, 0, magic, slot_count, count, sequence + 1)
+        offset, length = entry[6], entry[7]
+        if length == NO_TOUR:
+            return []
+        return decode(self._read_data(offset, length))
+
+    def _read_data(self, offset, length):
+        """length bytes of the data file from offset"""
+        self._data.seek(offset)
+        return self._data.read(length)
+
+    def put(self, rows, cols, start, closed, tour):
+        """store a tour, or an empty list to record that there is none
+
+        a closed tour is filed under (0, 0) and an open one under both its
+        ends, sharing the same data
+        """
+        closed = int(closed)
+        if closed:
+            start = (0, 0)
+        squares = [start]
+        if tour and not closed:
+            squares.append(tour[-1])
+        data = None
+        while True:
+            slots = [self._find(self._index, rows, cols, square, closed) for square in squares]
+            if all(entry[5] for _, entry in slots):
+                return  # already cached
+            if data is None:
+                data = encode(tour, rows, cols) if tour else b''
+                if len(data) > self.max_bytes:
+                    return  # would never fit
+            _, slot_count, count, sequence = HEADER.unpack_from(self._index, 0)
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            if (count + 2) * 10 <= slot_count * 7 and offset + len(data) <= self.max_bytes:
+                break
+            # rewrites both files, so the slots have to be found again
+            self._evict(len(data))
+
+        self._data.write(data)
+        self._data.flush()
+        length = len(data) if tour else NO_TOUR
+        for square in squares:
+            # found one at a time, both ends of a tour can probe to the same empty slot
+            slot_offset, entry = self._find(self._index, rows, cols, square, closed)
+            if not entry[5]:
+                SLOT.pack_into(self._index, slot_offset, rows, cols, square[0], square[1], closed, 1,
+                               offset, length, sequence)
+                count += 1
+        HEADER.pack_into(self._index, 0, MAGIC, slot_count, count, sequence + 1)
+
+    def _evict(self, incoming):
+        """drop the least recently used entries until the cache is at most half full"""
+        entries = []
+        for slot in range(self.slots):
+            entry = SLOT.unpack_from(self._index, HEADER.size + slot * SLOT.size)
+            if entry[5]:
+                entries.append(entry)
+        entries.sort(key=lambda entry: entry[8], reverse=True)
+
+        kept = []
+        size = incoming
+        for entry in entries[:self.slots * 7 // 20]:
+            length = 0 if entry[7] == NO_TOUR else entry[7]
+            if size + length > self.max_bytes // 2:
+                break
+            kept.append(entry)
+            size += length
+        kept.reverse()
+
+        # write the survivors to fresh files, then swap them in
+        self._create(self.path + '.new', self.slots)
+        with open(self.path + '.new', 'r+b') as index_file, \
+                open(self.data_path + '.new', 'wb') as data:
+            index = mmap.mmap(index_file.fileno(), 0)
+            moved = {}  # old (offset, length) -> new offset, entries can share their data
+            for entry in kept:
+                rows, cols, start_x, start_y, closed, used, offset, length, sequence = entry
+                slot_offset, _ = self._find(index, rows, cols, (start_x, start_y), closed)
+                if (offset, length) not in moved:
+                    moved[offset, length] = data.tell()
+                    if length != NO_TOUR:
+                        data.write(self._read_data(offset, length))
+                SLOT.pack_into(index, slot_offset, rows, cols, start_x, start_y, closed, used,
+                               moved[offset, length], length, sequence)
+            index.close()
+
+        self._close_files()
+        os.replace(self.data_path + '.new', self.data_path)
+        os.replace(self.path + '.new', self.path)
+        self._open()
+        sequence = max((entry[8] for entry in entries), default=-1) + 1
+        HEADER.pack_into(self._index, 0, MAGIC, self.slots, len(kept), sequence)
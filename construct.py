@@ -0,0 +1,152 @@
+"""construct.py
+divide and conquer construction of closed knights tours on large boards
+
+instead of searching, the board is cut into small blocks that each have a
+known closed tour. the block tours are laid down one after another and
+every new block is stitched into the tour built so far by swapping one
+edge of each cycle for two edges that cross the block boundary (in the
+spirit of Parberry's construction). the whole thing is O(rows*cols).
+
+closed_tour(rows, cols, start) works for any board with an even number of
+squares and both sides at least 5.
+"""
+
+from knight import OFFSETS
+
+# closed tours of the base blocks, as a walk from (0, 0) where every digit
+# is an index into OFFSETS. blocks are 5..9 rows by 6, 8 or 10 columns.
+BASE_TOURS = {
+    (5, 6): '01642311726413610753200637502',
+    (5, 8): '016314642357504313246415243714432570073',
+    (5, 10): '4613504220063702513531064643254175206275751463152',
+    (6, 6): '01420237501620713264107331046325435',
+    (6, 8): '01431646235754310420632575106602371072454432717',
+    (6, 10): '02501646423750062316755240432500733541576132601420752731063',
+    (7, 6): '01064316327510226101752320764051636311522',
+    (7, 8): '0106467023254351027350142325102624151360433771016462375',
+    (7, 10): '010206463275524601075723144423251720013602370135023750143164353261316',
+    (8, 6): '01046702327504513236010433205152363101462325435',
+    (8, 8): '010464316323575010254642327025751016462552314253310423160637053',
+    (8, 10): '0104354316464232702575710433142002536204314173431142313270136750106464316323575',
+    (9, 6): '01016425431632375010250254625223117063310645227502617',
+    (9, 8): '01016462502323167510057232604361010752270570261360763705343101064632375',
+    (9, 10): '01016706346237054334057310142345324102767350104646323754241015202323111162610752222575716',
+}
+
+
+def can_construct(rows, cols):
+    """check if closed_tour supports a board of this size"""
+    return min(rows, cols) >= 5 and (rows * cols) % 2 == 0
+
+
+def _split(n, lo, hi):
+    """split n into as few parts between lo and hi as possible, evenly sized"""
+    parts = -(-n // hi)
+    size, extra = divmod(n, parts)
+    return [size + 1] * extra + [size] * (parts - extra)
+
+
+def _base_tour(rows, cols):
+    """the squares of the base block tour, starting from (0, 0)"""
+    x, y = 0, 0
+    squares = [(0, 0)]
+    for code in BASE_TOURS[(rows, cols)]:
+        dx, dy = OFFSETS[int(code)]
+        x += dx
+        y += dy
+        squares.append((x, y))
+    return squares
+
+
+def _cycle(rows, cols):
+    """build a closed tour as a pair of cycle neighbours for every square"""
+    # block heights of 5..9 rows and even block widths of 6..10 columns
+    heights = _split(rows, 5, 9)
+    widths = [2 * half for half in _split(cols // 2, 3, 5)]
+
+    size = rows * cols
+    first = [-1] * size  # the two neighbours of each square on the cycle
+    second = [-1] * size
+    merged = bytearray(size)  # squares already part of the big cycle
+
+    top = 0
+    for height in heights:
+        left = 0
+        for width in widths:
+            # lay down the block's own closed tour
+            tour = [(top + x) * cols + left + y for x, y in _base_tour(height, width)]
+            for i, square in enumerate(tour):
+                first[square] = tour[i - 1]
+                second[square] = tour[(i + 1) % len(tour)]
+
+            if top or left:
+                _stitch(rows, cols, top, left, height, width, first, second, merged)
+
+            for square in tour:
+                merged[square] = 1
+            left += width
+        top += height
+
+    return first, second
+
+
+def _stitch(rows, cols, top, left, height, width, first, second, merged):
+    """join the block's cycle into the merged cycle with a two edge swap
+
+    looks for a cycle edge a1-a2 outside the block and b1-b2 inside it such
+    that a1-b1 and a2-b2 are knight moves, then replaces the two edges with
+    those two moves, which turns the two cycles into one
+    """
+    for bx in range(top, top + height):
+        for by in range(left, left + width):
+            # only squares within a knight's reach of the top or left edge
+            if bx - top >= 2 and by - left >= 2:
+                continue
+            b1 = bx * cols + by
+            for dx, dy in OFFSETS:
+                ax = bx + dx
+                ay = by + dy
+                if not (0 <= ax < rows and 0 <= ay < cols):
+                    continue
+                a1 = ax * cols + ay
+                if not merged[a1]:
+                    continue
+                for b2 in (first[b1], second[b1]):
+                    for a2 in (first[a1], second[a1]):
+                        ddx = abs(a2 // cols - b2 // cols)
+                        ddy = abs(a2 % cols - b2 % cols)
+                        if (ddx == 2 and ddy == 1) or (ddx == 1 and ddy == 2):
+                            _replace(first, second, a1, a2, b1)
+                            _replace(first, second, a2, a1, b2)
+                            _replace(first, second, b1, b2, a1)
+                            _replace(first, second, b2, b1, a2)
+                            return
+    raise ValueError(f"could not stitch the {height}x{width} block at ({top}, {left})")
+
+
+def _replace(first, second, square, old, new):
+    """swap one cycle neighbour of square for another"""
+    if first[square] == old:
+        first[square] = new
+    else:
+        second[square] = new
+
+
+def closed_tour(rows, cols, start=(0, 0)):
+    """construct a closed knight's tour as a list of squares beginning at start"""
+    if not can_construct(rows, cols):
+        raise ValueError(f"cannot construct a closed tour on a {rows}x{cols} board")
+
+    if cols % 2:
+        # block widths have to be even, build on the transposed board
+        return [(x, y) for y, x in closed_tour(cols, rows, (start[1], start[0]))]
+
+    first, second = _cycle(rows, cols)
+    current = start[0] * cols + start[1]
+    previous = -1
+    moves = []
+    for _ in range(rows * cols):
+        moves.append(divmod(current, cols))
+        following = first[current] if first[current] != previous else second[current]
+        previous, current = current, following
+    return moves
@@ -61,10 +61,7 @@ class KnightsTourGUI:
         if self.start_mode:
             self.start_mode = False
             self.knight = Knight(N=self.rows, M=self.cols)
-            self.knight.board.x = row
-            self.knight.board.y = col
-            self.knight.board.get_cell(row, col).mark_visited()
-            self.knight.board.moves.append((row, col))
+            self.knight.set_start_position(row, col)
             self.animate_solution()
         else:
             print("Click 'Solve' and then select a starting square.")
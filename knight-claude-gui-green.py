@@ -1,6 +1,11 @@
 import tkinter as tk
+import argparse
+import os
 import time
 from knight import Knight
+from cache import SolutionCache
+from solver_thread import SolverThread
+from board_canvas import BoardCanvas
 
 GREEN = "#90ee90"
 DARK_GREEN = "#006400"
@@ -8,9 +13,13 @@ HIGHLIGHT = "#add8e6"
 KNIGHT_COLOR = "#000000"
 LIGHT_SQUARE = "#f0d9b5"  # Chess board light square
 DARK_SQUARE = "#b58863"   # Chess board dark square
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".knights-tour-cache")  # default for --cache
+POLL_MS = 50  # how often the solver thread's messages are picked up
+FRAME_MS = 30  # animation frame interval on big boards
+ANIMATION_MS = 12000  # about how long a big tour takes to animate
 
 class KnightsTourGUI:
-    def __init__(self, root):
+    def __init__(self, root, cache_path=None):
         self.root = root
         self.root.title("Knight's Tour Solver")
         self.solving = False
@@ -20,8 +29,19 @@ class KnightsTourGUI:
         self.knight = None
         self.rows = 0
         self.cols = 0
-        self.buttons = []
+        self.view = None
         self.solution = []
+        self.shown = -1  # last solution index drawn by update_solution_board
+        self.animation = None  # pending animation callback
+        self.solver = None
+        # solved tours kept between runs, only when asked for with --cache
+        self.cache = None
+        if cache_path is not None:
+            try:
+                self.cache = SolutionCache(cache_path)
+            except (OSError, ValueError) as error:
+                # held by another window, or not a cache at all
+                print(f"Running without the solution cache: {error}")
 
         # Size entry fields
         size_frame = tk.Frame(self.root)
@@ -42,6 +62,9 @@ class KnightsTourGUI:
         self.setup_controls()
 
     def set_board_size(self):
+        if self.solving:
+            self.status_label.config(text="Cancel the search before changing the board")
+            return
         try:
             rows = int(self.rows_entry.get())
             cols = int(self.cols_entry.get())
@@ -61,6 +84,9 @@ class KnightsTourGUI:
         
         self.closed_tour_var = tk.BooleanVar(value=True)
         tk.Checkbutton(control_frame, text="Closed Tour", variable=self.closed_tour_var).pack(side=tk.LEFT, padx=5)
+
+        self.watch_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(control_frame, text="Show Search", variable=self.watch_var).pack(side=tk.LEFT, padx=5)
         
         self.player_button = tk.Button(control_frame, text="Play Mode", command=self.enter_player_mode)
         self.player_button.pack(side=tk.LEFT, padx=5, pady=10)
@@ -68,6 +94,9 @@ class KnightsTourGUI:
         self.reset_button = tk.Button(control_frame, text="Reset", command=self.reset_board)
         self.reset_button.pack(side=tk.LEFT, padx=5, pady=10)
 
+        self.cancel_button = tk.Button(control_frame, text="Cancel", state='disabled', command=self.cancel_solve)
+        self.cancel_button.pack(side=tk.LEFT, padx=5, pady=10)
+
         self.status_label = tk.Label(self.root, text="Select board size and click 'Select Start'")
         self.status_label.pack(pady=5)
 
@@ -80,34 +109,17 @@ class KnightsTourGUI:
     def initialize_board(self, rows, cols):
         self.rows = rows
         self.cols = cols
-        self.knight = Knight(N=rows, M=cols)
+        self.knight = Knight(N=rows, M=cols, cache=self.cache)
         self.solution = []
         self.player_mode = False
 
-        # Clear old buttons
-        for widget in self.board_frame.winfo_children():
-            widget.destroy()
-
-        self.buttons = []
-        for row in range(self.rows):
-            button_row = []
-            for col in range(self.cols):
-                # Alternating colors for chess-like pattern
-                if (row + col) % 2 == 0:
-                    bg_color = LIGHT_SQUARE
-                else:
-                    bg_color = DARK_SQUARE
-                
-                # Create button with coordinates
-                btn = tk.Button(self.board_frame, bg=bg_color, width=6, height=3, 
-                                command=lambda r=row, c=col: self.handle_click(r, c))
-                
-                # Add coordinate label
-                btn.config(text=f"({row},{col})")
-                
-                btn.grid(row=row, column=col, padx=1, pady=1)
-                button_row.append(btn)
-            self.buttons.append(button_row)
+        self.stop_animation()
+        if self.view:
+            self.view.destroy()
+        # one canvas for the whole board, only changed squares get redrawn
+        self.view = BoardCanvas(self.board_frame, rows, cols, on_click=self.handle_click,
+                                light=LIGHT_SQUARE, dark=DARK_SQUARE)
+        self.view.pack()
 
         self.update_board()
         self.status_label.config(text="Select board size and click 'Select Start'")
@@ -115,6 +127,10 @@ class KnightsTourGUI:
         self.player_button.config(state='normal')
 
     def reset_board(self):
+        if self.solving:
+            self.status_label.config(text="Cancel the search before resetting")
+            return
+        self.stop_animation()
         if self.knight:
             self.knight.board.reset()
             self.solution = []
@@ -140,8 +156,12 @@ class KnightsTourGUI:
         self.player_button.config(state='disabled')
 
     def handle_click(self, row, col):
+        if self.solving:
+            # the board belongs to the solver thread until it finishes
+            return
         if self.start_mode:
             # First click - set starting position
+            self.stop_animation()
             self.knight.board.reset()
             self.knight.set_start_position(row, col)
             self.update_board()
@@ -154,30 +174,22 @@ class KnightsTourGUI:
                 # Solver mode
                 self.start_mode = False
                 self.status_label.config(text="Solving... please wait")
-                self.root.update()
                 
                 # Attempt to solve
-                closed_tour = self.closed_tour_var.get()
-                self.root.after(100, lambda: self.solve_tour(closed_tour))
+                self.solve_tour(self.closed_tour_var.get())
         
         elif self.player_mode:
             # Player is making moves
+            board = self.knight.board
+            previous = (board.x, board.y)
+            highlighted = board.get_available_moves()
             success = self.knight.move(row, col)
             if success:
                 # Valid move made
-                self.update_board(highlight_last=True)
+                self.update_player_move(previous, highlighted)
                 
                 # Check if all cells are visited
-                all_visited = True
-                for r in range(self.rows):
-                    for c in range(self.cols):
-                        if not self.knight.board.get_cell(r, c).visited:
-                            all_visited = False
-                            break
-                    if not all_visited:
-                        break
-                
-                if all_visited:
+                if self.knight.board.isSolved():
                     self.status_label.config(text="Congratulations! You completed the knight's tour!")
                     self.solve_button.config(state='normal', text="Select Start")
                     self.player_button.config(state='normal')
@@ -198,23 +210,73 @@ class KnightsTourGUI:
             self.status_label.config(text="Click 'Select Start' or 'Play Mode' first")
 
     def solve_tour(self, closed_tour):
-        if closed_tour:
-            success = self.knight.solve_closed_tour()
+        # solve on a worker thread and poll it, so the window stays responsive
+        self.solving = True
+        self.solver = SolverThread(self.knight, closed=closed_tour, watch=self.watch_var.get())
+        self.solver.start()
+        self.cancel_button.config(state='normal')
+        self.root.after(POLL_MS, self.poll_solver)
+
+    def cancel_solve(self):
+        if self.solver and self.solver.is_alive():
+            self.solver.cancel()
+            self.status_label.config(text="Cancelling...")
         else:
-            success = self.knight.solve()
-            
-        if success:
-            self.solution = self.knight.board.moves.copy()
+            # the worker already finished, its result arrives on the next poll
+            self.cancel_button.config(state='disabled')
+
+    def poll_solver(self):
+        if self.solver.events is not None:
+            # one frame of the live search, everything since the last poll at once
+            for x, y, visited in self.solver.changes():
+                self.view.set_square(x, y, GREEN if visited else None, f"{x},{y}")
+            board = self.knight.board
+            self.view.move_knight(board.x, board.y)
+
+        for message in self.solver.poll():
+            if message[0] == 'progress':
+                _, nodes, depth, best_depth, seconds = message
+                self.status_label.config(
+                    text=f"Solving... {nodes:,} moves tried, depth {depth}, best {best_depth}, {seconds:.1f}s")
+            elif message[0] == 'done':
+                self.finish_solve(message[1])
+                return
+            else:
+                self.finish_solve(None, error=message[1])
+                return
+        self.root.after(POLL_MS, self.poll_solver)
+
+    def finish_solve(self, result, error=None):
+        self.solving = False
+        self.solver = None
+        self.cancel_button.config(state='disabled')
+
+        if result:
+            self.solution = result.path
             self.status_label.config(text=f"Solution found! Animating {len(self.solution)} moves...")
             self.animate_solution(0)
+            return
+
+        if error is not None:
+            self.status_label.config(text=f"Solver failed: {error}")
+        elif result.status in ('cancelled', 'timeout', 'node limit') and len(result.path) > 1:
+            # show the best effort instead of nothing
+            self.solution = result.path
+            self.status_label.config(text=f"Search {result.status}, showing the longest path found "
+                                          f"({len(self.solution)} squares)")
+            self.animate_solution(0)
+            return
         else:
             self.status_label.config(text="No solution found from this starting position")
-            self.solve_button.config(state='normal', text="Select Start")
-            self.player_button.config(state='normal')
+        self.solve_button.config(state='normal', text="Select Start")
+        self.player_button.config(state='normal')
 
     def animate_solution(self, move_index):
         if move_index >= len(self.solution):
-            self.status_label.config(text="Solution complete!")
+            self.animation = None
+            self.update_solution_board(len(self.solution) - 1)
+            if len(self.solution) == self.rows * self.cols:
+                self.status_label.config(text="Solution complete!")
             self.solve_button.config(state='normal', text="Select Start")
             self.player_button.config(state='normal')
             return
@@ -222,69 +284,86 @@ class KnightsTourGUI:
         # Update board to show current state
         self.update_solution_board(move_index)
         
-        # Schedule next animation step
-        self.root.update()
-        self.root.after(200, lambda: self.animate_solution(move_index + 1))
+        # Schedule next animation step, big tours move several squares a frame
+        if len(self.solution) * 200 <= ANIMATION_MS:
+            step, delay = 1, 200
+        else:
+            step, delay = -(-len(self.solution) * FRAME_MS // ANIMATION_MS), FRAME_MS
+        self.animation = self.root.after(delay, lambda: self.animate_solution(move_index + step))
+
+    def stop_animation(self):
+        if self.animation is not None:
+            self.root.after_cancel(self.animation)
+            self.animation = None
+
+    def solution_colour(self, i):
+        # Intensity of green depends on when it was visited
+        intensity = max(50, 255 - int(200 * i / (len(self.solution) - 1))) if len(self.solution) > 1 else 150
+        return f"#{0:02x}{intensity:02x}{0:02x}"
 
     def update_solution_board(self, move_index):
-        # Reset all cells to their original color, keeping coordinates visible
-        for row in range(self.rows):
-            for col in range(self.cols):
-                if (row + col) % 2 == 0:
-                    self.buttons[row][col].config(bg=LIGHT_SQUARE)
-                else:
-                    self.buttons[row][col].config(bg=DARK_SQUARE)
-                
-                self.buttons[row][col].config(text=f"({row},{col})")
-        
-        # Color all visited cells green
-        for i in range(move_index + 1):
+        if move_index < self.shown:
+            # going backwards, start again from a plain board
+            self.shown = -1
+        if self.shown < 0:
+            for row in range(self.rows):
+                for col in range(self.cols):
+                    self.view.set_square(row, col, None, f"{row},{col}")
+
+        # only the squares reached since the last frame are painted
+        for i in range(self.shown + 1, move_index + 1):
             x, y = self.solution[i]
-            # Intensity of green depends on when it was visited
-            intensity = max(50, 255 - int(200 * i / (len(self.solution) - 1))) if len(self.solution) > 1 else 150
-            green_color = f"#{0:02x}{intensity:02x}{0:02x}"
-            self.buttons[x][y].config(bg=green_color, text=f"({x},{y})\n{i}")
+            self.view.set_square(x, y, self.solution_colour(i), f"{x},{y}  {i}")
+        self.shown = move_index
         
         # Show knight at current position
-        current_x, current_y = self.solution[move_index]
-        self.buttons[current_x][current_y].config(text=f"({current_x},{current_y})\n♞\n{move_index}")
+        self.view.move_knight(*self.solution[move_index])
+
+    def update_player_move(self, previous, highlighted):
+        """repaint what a player's move changed: the square the knight left,
+        the moves highlighted from there and from its new square"""
+        self.shown = -1
+        board = self.knight.board
+        self.view.set_square(previous[0], previous[1], GREEN, f"{previous[0]},{previous[1]}")
+        for x, y in highlighted:
+            self.view.set_square(x, y, None, f"{x},{y}")
+        x, y = board.x, board.y
+        self.view.set_square(x, y, DARK_GREEN, f"{x},{y}")
+        self.view.move_knight(x, y)
+        for move_x, move_y in board.get_available_moves():
+            self.view.set_square(move_x, move_y, HIGHLIGHT, f"{move_x},{move_y}")
 
-    def update_board(self, highlight_last=False):
+    def update_board(self):
+        # repaints from the knight's board, the canvas skips unchanged squares
+        self.shown = -1
+        board = self.knight.board
         for row in range(self.rows):
             for col in range(self.cols):
-                cell = self.knight.board.get_cell(row, col)
-                
-                # Keep the coordinates visible
-                coord_text = f"({row},{col})"
-                
+                cell = board.get_cell(row, col)
                 if cell and cell.visited:
-                    # Green for visited cells, showing coordinates
-                    self.buttons[row][col].config(bg=GREEN, text=coord_text)
+                    # Green for visited cells
+                    self.view.set_square(row, col, GREEN, f"{row},{col}")
                 else:
                     # Original chess pattern for unvisited
-                    if (row + col) % 2 == 0:
-                        self.buttons[row][col].config(bg=LIGHT_SQUARE, text=coord_text)
-                    else:
-                        self.buttons[row][col].config(bg=DARK_SQUARE, text=coord_text)
+                    self.view.set_square(row, col, None, f"{row},{col}")
         
         # Show knight at current position
-        if self.knight and self.knight.board.moves:
-            x, y = self.knight.board.x, self.knight.board.y
-            
-            # For the last move in player mode, use darker green
-            if highlight_last and self.player_mode:
-                self.buttons[x][y].config(bg=DARK_GREEN)
-            
-            # Show knight symbol with coordinates
-            self.buttons[x][y].config(text=f"({x},{y})\n♞")
+        if self.knight and board.moves:
+            x, y = board.x, board.y
+            self.view.move_knight(x, y)
             
             # If in player mode, highlight available moves
             if self.player_mode:
-                available_moves = self.knight.board.get_available_moves()
-                for move_x, move_y in available_moves:
-                    self.buttons[move_x][move_y].config(bg=HIGHLIGHT)
+                for move_x, move_y in board.get_available_moves():
+                    self.view.set_square(move_x, move_y, HIGHLIGHT, f"{move_x},{move_y}")
+        else:
+            self.view.hide_knight()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knight's tour solver and player")
+    parser.add_argument("--cache", nargs="?", const=CACHE_PATH, metavar="PATH",
+                        help=f"keep solved tours between runs (default path: {CACHE_PATH})")
+    args = parser.parse_args()
     root = tk.Tk()
-    app = KnightsTourGUI(root)
+    app = KnightsTourGUI(root, args.cache)
     root.mainloop()
\ No newline at end of file
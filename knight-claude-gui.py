@@ -1,11 +1,12 @@
 import tkinter as tk
-import time
 from knight import Knight
+from solver_thread import SolverThread
 
 GREEN = "#90ee90"
 DARK_GREEN = "#006400"
 HIGHLIGHT = "#add8e6"
 KNIGHT_COLOR = "#000000"
+POLL_MS = 50  # how often the solver thread's messages are picked up
 
 class KnightsTourGUI:
     def __init__(self, root):
@@ -19,6 +20,7 @@ class KnightsTourGUI:
         self.cols = 0
         self.buttons = []
         self.solution = []
+        self.solver = None
 
         # Size entry fields
         size_frame = tk.Frame(self.root)
@@ -39,6 +41,9 @@ class KnightsTourGUI:
         self.setup_controls()
 
     def set_board_size(self):
+        if self.solving:
+            self.status_label.config(text="Cancel the search before changing the board")
+            return
         try:
             rows = int(self.rows_entry.get())
             cols = int(self.cols_entry.get())
@@ -62,6 +67,9 @@ class KnightsTourGUI:
         self.reset_button = tk.Button(control_frame, text="Reset", command=self.reset_board)
         self.reset_button.pack(side=tk.LEFT, padx=5, pady=10)
 
+        self.cancel_button = tk.Button(control_frame, text="Cancel", state='disabled', command=self.cancel_solve)
+        self.cancel_button.pack(side=tk.LEFT, padx=5, pady=10)
+
         self.status_label = tk.Label(self.root, text="Select board size and click 'Select Start'")
         self.status_label.pack(pady=5)
 
@@ -96,6 +104,9 @@ class KnightsTourGUI:
         self.solve_button.config(state='normal', text="Select Start")
 
     def reset_board(self):
+        if self.solving:
+            self.status_label.config(text="Cancel the search before resetting")
+            return
         if self.knight:
             self.knight.board.reset()
             self.solution = []
@@ -110,10 +121,12 @@ class KnightsTourGUI:
         self.solve_button.config(state='disabled')
 
     def handle_click(self, row, col):
+        if self.solving:
+            # the board belongs to the solver thread until it finishes
+            return
         if self.start_mode:
             self.start_mode = False
             self.status_label.config(text="Solving... please wait")
-            self.root.update()
             
             # Reset board and set start position
             self.knight.board.reset()
@@ -121,28 +134,68 @@ class KnightsTourGUI:
             self.update_board()
             
             # Attempt to solve
-            closed_tour = self.closed_tour_var.get()
-            self.root.after(100, lambda: self.solve_tour(closed_tour))
+            self.solve_tour(self.closed_tour_var.get())
         else:
             self.status_label.config(text="Click 'Select Start' first to choose a starting position")
 
     def solve_tour(self, closed_tour):
-        if closed_tour:
-            success = self.knight.solve_closed_tour()
+        # solve on a worker thread and poll it, so the window stays responsive
+        self.solving = True
+        self.solver = SolverThread(self.knight, closed=closed_tour)
+        self.solver.start()
+        self.cancel_button.config(state='normal')
+        self.root.after(POLL_MS, self.poll_solver)
+
+    def cancel_solve(self):
+        if self.solver and self.solver.is_alive():
+            self.solver.cancel()
+            self.status_label.config(text="Cancelling...")
         else:
-            success = self.knight.solve()
-            
-        if success:
-            self.solution = self.knight.board.moves.copy()
+            # the worker already finished, its result arrives on the next poll
+            self.cancel_button.config(state='disabled')
+
+    def poll_solver(self):
+        for message in self.solver.poll():
+            if message[0] == 'progress':
+                _, nodes, depth, best_depth, seconds = message
+                self.status_label.config(
+                    text=f"Solving... {nodes:,} moves tried, depth {depth}, best {best_depth}, {seconds:.1f}s")
+            elif message[0] == 'done':
+                self.finish_solve(message[1])
+                return
+            else:
+                self.finish_solve(None, error=message[1])
+                return
+        self.root.after(POLL_MS, self.poll_solver)
+
+    def finish_solve(self, result, error=None):
+        self.solving = False
+        self.solver = None
+        self.cancel_button.config(state='disabled')
+
+        if result:
+            self.solution = result.path
             self.status_label.config(text=f"Solution found! Animating {len(self.solution)} moves...")
             self.animate_solution(0)
+            return
+
+        if error is not None:
+            self.status_label.config(text=f"Solver failed: {error}")
+        elif result.status in ('cancelled', 'timeout', 'node limit') and len(result.path) > 1:
+            # show the best effort instead of nothing
+            self.solution = result.path
+            self.status_label.config(text=f"Search {result.status}, showing the longest path found "
+                                          f"({len(self.solution)} squares)")
+            self.animate_solution(0)
+            return
         else:
             self.status_label.config(text="No solution found from this starting position")
-            self.solve_button.config(state='normal', text="Select Start")
+        self.solve_button.config(state='normal', text="Select Start")
 
     def animate_solution(self, move_index):
         if move_index >= len(self.solution):
-            self.status_label.config(text="Solution complete!")
+            if len(self.solution) == self.rows * self.cols:
+                self.status_label.config(text="Solution complete!")
             self.solve_button.config(state='normal', text="Select Start")
             return
             
@@ -171,7 +224,6 @@ class KnightsTourGUI:
             self.buttons[current_x][current_y].config(text=f"♞\n{move_num}")
         
         # Schedule next animation step
-        self.root.update()
         self.root.after(200, lambda: self.animate_solution(move_index + 1))
 
     def update_board(self):
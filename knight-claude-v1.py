@@ -160,32 +160,48 @@ class Knight:
         return board_str
         
     def solve(self, tour=False):
-        """solve the knights tour using Warnsdorff's heuristic"""
-        # Check if we've already visited all cells
+        """solve the knights tour using Warnsdorff's heuristic
+
+        iterative dfs with an explicit stack of (square, remaining candidates)
+        frames instead of one recursive call per move
+        """
         total_cells = self.board.rows * self.board.cols
-        
+
         if self.board.moveCount == total_cells - 1:
-            # We've visited all cells except the current one
-            if not tour or self.board.isSolved(tour):
-                return True
-            return False
-        
-        # Warnsdorff's heuristic: sort moves by number of onward moves (fewer first)
-        moves = self.board.get_available_moves()
-        if not moves:
-            return False
-            
-        # Sort by the number of onward moves (fewer options first)
-        moves.sort(key=lambda move: len(self.board.get_available_moves_from(move)))
-        
-        for move_x, move_y in moves:
-            if self.board.move(move_x, move_y):
-                if self.solve(tour):
+            return not tour or self.board.isSolved(tour)
+
+        stack = [((self.board.x, self.board.y), self.ordered_moves())]
+        while stack:
+            candidates = stack[-1][1]
+            if not candidates:
+                stack.pop()
+                if stack:
+                    self.board.undo_move()
+                continue
+
+            move_x, move_y = candidates.pop()
+            if not self.board.move(move_x, move_y):
+                continue
+
+            if self.board.moveCount == total_cells - 1:
+                # We've visited all cells except the current one
+                if not tour or self.board.isSolved(tour):
                     return True
                 self.board.undo_move()
-        
+                continue
+
+            stack.append(((move_x, move_y), self.ordered_moves()))
+
         return False
 
+    def ordered_moves(self):
+        """available moves sorted by Warnsdorff's heuristic, best candidate last"""
+        moves = self.board.get_available_moves()
+        # Sort by the number of onward moves (fewer options first)
+        moves.sort(key=lambda move: len(self.board.get_available_moves_from(move)))
+        moves.reverse()
+        return moves
+
     def solve_closed_tour(self):
         """Specifically solve for a closed knights tour"""
         return self.solve(tour=True)
@@ -167,7 +167,8 @@ class Knight:
         return self.moveCount
 
     def encode_board(self):
-        """encodes the board so rotations and reflections are the same"""
+        """encodes the visited squares as an int (rotations and reflections are
+        not merged here, transposition.py does that for knight.py)"""
         board_as_str = "".join("1" if cell.visited else "0" for row in self.board.board for cell in row)
         print(board_as_str)
         return int(board_as_str,2)
@@ -4,7 +4,18 @@ input: starting square
 output: sequence of moves
 """
 
+import json
+import random
+import time
+from array import array
+from itertools import repeat
+
+OFFSETS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+CHECK_EVERY = 1024  # nodes between checks of the time budget and cancel flag
+
 class Cell:
+    __slots__ = ('x', 'y', 'visited')
+
     def __init__(self, x, y):
         """Represents a cell on the board"""
         self.x = x
@@ -25,18 +36,158 @@ class Cell:
         dy = abs(y - self.y)
         return (dx == 2 and dy == 1) or (dx == 1 and dy == 2)
 
+class CellView(Cell):
+    """A cell read from a Board's arrays, made when get_cell asks for it
+
+    visited reads and writes the board itself, so a view never goes stale.
+    the squares on the knight's path can't be unmarked through it
+    """
+    __slots__ = ('board',)
+
+    def __init__(self, board, x, y):
+        self.board = board
+        self.x = x
+        self.y = y
+
+    @property
+    def visited(self):
+        return bool(self.board.visited[self.x * self.board.cols + self.y])
+
+    @visited.setter
+    def visited(self, visited):
+        self.board._set_visited(self.x, self.y, visited)
+
+class MoveStack:
+    """The knight's path as flat square indices in an array
+
+    reads like the list of (x, y) tuples it replaces, at four bytes a step
+    """
+    __slots__ = ('cols', 'squares')
+
+    def __init__(self, cols, moves=()):
+        self.cols = cols
+        self.squares = array('I', [x * cols + y for x, y in moves])
+
+    def __len__(self):
+        return len(self.squares)
+
+    def __iter__(self):
+        return map(divmod, self.squares, repeat(self.cols))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(map(divmod, self.squares[index], repeat(self.cols)))
+        return divmod(self.squares[index], self.cols)
+
+    def __eq__(self, other):
+        if isinstance(other, MoveStack):
+            return self.cols == other.cols and self.squares == other.squares
+        return list(self) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def append(self, move):
+        x, y = move
+        self.squares.append(x * self.cols + y)
+
+    def pop(self):
+        return divmod(self.squares.pop(), self.cols)
+
+    def clear(self):
+        del self.squares[:]
+
+    def copy(self):
+        """the moves as a plain list"""
+        return list(self)
+
 class Board:
     def __init__(self, rows, cols):
-        """create a board of size NxM"""
+        """create a board of size NxM
+
+        the squares are flat indices x * cols + y into a byte per square for
+        visited and a byte per square for the degrees, and the moves are
+        kept in an array, so a board costs a few bytes a square however big
+        it gets
+        """
         self.rows = rows
         self.cols = cols
-        self.board = [[Cell(row, col) for col in range(cols)] for row in range(rows)]
+        self.visited = bytearray(rows * cols)  # 1 once the knight has been on a square
         self.x = 0  # knight's x coordinate
         self.y = 0  # knight's y coordinate
         self.start_x = 0  # starting position for closed tour
         self.start_y = 0
         self.moveCount = 0
-        self.moves = []  # Don't add starting position yet
+        self.visitedCount = 0  # squares visited, so completion checks are O(1)
+        self.moves = MoveStack(cols)  # Don't add starting position yet
+        # number of unvisited neighbours of every square (0 to 8), kept up
+        # to date by move and undo_move so Warnsdorff can read degrees
+        # directly. reset copies the empty board's table back over it
+        self._empty_degrees = self._degree_table()
+        self.degrees = bytearray(self._empty_degrees)
+        # flat index step of every offset, valid two squares from the edges
+        self._steps = tuple(dx * cols + dy for dx, dy in OFFSETS)
+
+    def _degree_table(self):
+        """the degrees of an empty board, a row at a time
+
+        a row's degrees only depend on which offsets stay on the board
+        vertically, and there are at most five kinds of row, so each kind
+        is worked out once and repeated
+        """
+        rows, cols = self.rows, self.cols
+        kinds = {}
+        table = bytearray()
+        for x in range(rows):
+            steps = tuple(dy for dx, dy in OFFSETS if 0 <= x + dx < rows)
+            if steps not in kinds:
+                kinds[steps] = bytes(sum(1 for dy in steps if 0 <= y + dy < cols)
+                                     for y in range(cols))
+            table += kinds[steps]
+        return bytes(table)
+
+    def _update_degrees(self, x, y, delta):
+        """add delta to the degree of every neighbour of (x, y)"""
+        degrees = self.degrees
+        rows, cols = self.rows, self.cols
+        if 2 <= x < rows - 2 and 2 <= y < cols - 2:
+            # all eight neighbours are on the board, skip the bounds checks
+            square = x * cols + y
+            a, b, c, d, e, f, g, h = self._steps
+            degrees[square + a] += delta
+            degrees[square + b] += delta
+            degrees[square + c] += delta
+            degrees[square + d] += delta
+            degrees[square + e] += delta
+            degrees[square + f] += delta
+            degrees[square + g] += delta
+            degrees[square + h] += delta
+            return
+        for dx, dy in OFFSETS:
+            new_x = x + dx
+            new_y = y + dy
+            if 0 <= new_x < rows and 0 <= new_y < cols:
+                degrees[new_x * cols + new_y] += delta
+
+    def _set_visited(self, x, y, visited):
+        """mark a square visited or not by hand, keeping the degrees right
+
+        the squares on the knight's path belong to move and undo_move, so
+        unmarking one of them raises ValueError
+        """
+        square = x * self.cols + y
+        if self.visited[square] != visited:
+            if visited:
+                self.visitedCount += 1
+                self._update_degrees(x, y, -1)
+            else:
+                if square in self.moves.squares:
+                    raise ValueError(f"({x}, {y}) is on the knight's path, undo_move takes it back")
+                self.visitedCount -= 1
+                self._update_degrees(x, y, 1)
+            self.visited[square] = visited
     
     def set_start_position(self, x, y):
         """Set the starting position of the knight"""
@@ -45,58 +196,52 @@ class Board:
             self.y = y
             self.start_x = x
             self.start_y = y
-            self.board[x][y].mark_visited()
-            self.moves = [(x, y)]  # Set starting position
+            self._set_visited(x, y, True)
+            self.moves = MoveStack(self.cols, [(x, y)])  # Set starting position
             self.moveCount = 0
             return True
         return False
     
     def get_cell(self, x, y):
-        """Retrieve a specific cell on the board"""
+        """Retrieve a view of a specific cell on the board"""
         if 0 <= x < self.rows and 0 <= y < self.cols:
-            return self.board[x][y]
+            return CellView(self, x, y)
         else:
             return None  # Return None for out of bounds
     
     def get_available_moves(self):
         """Get all available moves for the knight"""
-        moves = []
-        for dx, dy in [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]:
-            new_x = self.x + dx
-            new_y = self.y + dy
-            if 0 <= new_x < self.rows and 0 <= new_y < self.cols and not self.board[new_x][new_y].visited:
-                moves.append((new_x, new_y))
-        return moves
+        return self.get_available_moves_from((self.x, self.y))
 
     def get_available_moves_from(self, pos):
         """Get all available moves from a specific position"""
         x, y = pos
+        rows, cols = self.rows, self.cols
+        visited = self.visited
         moves = []
-        for dx, dy in [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]:
+        for dx, dy in OFFSETS:
             new_x = x + dx
             new_y = y + dy
-            if 0 <= new_x < self.rows and 0 <= new_y < self.cols and not self.board[new_x][new_y].visited:
+            if 0 <= new_x < rows and 0 <= new_y < cols and not visited[new_x * cols + new_y]:
                 moves.append((new_x, new_y))
         return moves
 
+    def count_moves_from(self, pos):
+        """Count the available moves from a specific position"""
+        x, y = pos
+        return self.degrees[x * self.cols + y]
+
     def printBoard(self):
         """print the board"""
-        for row in self.board:
-            print(' '.join(str(cell) for cell in row))
+        for x in range(self.rows):
+            print(' '.join(str(self.get_cell(x, y)) for y in range(self.cols)))
         print(f"Knight position: ({self.x}, {self.y})")
         print(f"Moves available: {len(self.get_available_moves())} and they are {self.get_available_moves()}")
     
     def isSolved(self, tour=False):
         """check if the board is solved"""
         # Check if all cells have been visited
-        all_visited = True
-        for row in self.board:
-            for cell in row:
-                if not cell.visited:
-                    all_visited = False
-                    break
-            if not all_visited:
-                break
+        all_visited = self.visitedCount == self.rows * self.cols
         
         # If we're checking for a closed tour, make sure we can return to start
         if tour and all_visited:
@@ -109,21 +254,28 @@ class Board:
         return all_visited
     
     def reset(self):
-        """Reset the board"""
-        for row in self.board:
-            for cell in row:
-                cell.visited = False
+        """Reset the board
+
+        both tables are copied back whole from the empty board, which is
+        two memory copies however many squares were visited
+        """
+        self.visited[:] = bytes(len(self.visited))
+        self.degrees[:] = self._empty_degrees
+        self.visitedCount = 0
         self.moveCount = 0
-        self.moves = []
+        self.moves = MoveStack(self.cols)
     
     def undo_move(self):
         """undo the knight's last move"""
         if len(self.moves) <= 1:  # Don't remove the starting position
             return False
         
-        self.board[self.x][self.y].visited = False
-        self.moves.pop()  # Remove current position
-        self.x, self.y = self.moves[-1]  # Get the previous position
+        self.visited[self.x * self.cols + self.y] = 0
+        self.visitedCount -= 1
+        self._update_degrees(self.x, self.y, 1)
+        squares = self.moves.squares
+        squares.pop()  # Remove current position
+        self.x, self.y = divmod(squares[-1], self.cols)  # Get the previous position
         self.moveCount -= 1
         
         return True
@@ -135,7 +287,8 @@ class Board:
             return False
             
         # Check if unvisited
-        if self.board[x][y].visited:
+        square = x * self.cols + y
+        if self.visited[square]:
             return False
             
         # Check if valid knight move
@@ -147,8 +300,10 @@ class Board:
         self.x = x
         self.y = y
         self.moveCount += 1
-        self.board[x][y].mark_visited()
-        self.moves.append((x, y))
+        self.visitedCount += 1
+        self.visited[square] = 1
+        self._update_degrees(x, y, -1)
+        self.moves.squares.append(square)
         
         return True
 
@@ -160,76 +315,853 @@ class Board:
         print(f"Total moves: {self.moveCount}")
 
 
+class Warnsdorff:
+    """Warnsdorff's rule: fewest onward moves first, ties nearest the edge
+
+    ties go to the square closest to an edge of the board, then to the one
+    furthest from the centre. breaking them in the order of the offsets
+    instead lets the knight wander off the edges and strand squares behind
+    it, which on big boards means a linear pass gives up and a backtracking
+    search never recovers (1000x1000 and 500x500 from the corner).
+
+    only the moves tied for the fewest onward moves are put through the
+    tie-break, the rest stay in the order of their onward moves.
+
+    with backtrack=False the search only ever tries the best candidate, so
+    it is a single linear pass that either completes a tour or gives up
+    """
+
+    def __init__(self, backtrack=True):
+        self.backtrack = backtrack
+        self._ranks = None  # (rows, cols, ranks) for the last board size seen
+
+    def square_ranks(self, rows, cols, edge=True):
+        """the tie-break of every square on an empty board, smallest first,
+        as an array indexed by flat square
+
+        the distance to the nearest edge and the squared distance from the
+        centre are packed into one int. edge=False leaves only the centre
+        """
+        # every squared distance (doubled coordinates) is less than far
+        far = (rows - 1) ** 2 + (cols - 1) ** 2 + 1
+        top = far * ((min(rows, cols) + 1) // 2 if edge else 1)
+        ranks = array('I' if top < 1 << 32 else 'Q')
+        edge_y = [min(y, cols - 1 - y) if edge else 0 for y in range(cols)]
+        centre_y = [far - 1 - (2 * y - (cols - 1)) ** 2 for y in range(cols)]
+        for x in range(rows):
+            edge_x = min(x, rows - 1 - x) if edge else 0
+            centre_x = (2 * x - (rows - 1)) ** 2
+            ranks.extend([min(edge_x, e) * far + c - centre_x
+                          for e, c in zip(edge_y, centre_y)])
+        return ranks
+
+    def ranks(self, board):
+        """square_ranks for the board, worked out once per board size"""
+        rows, cols = board.rows, board.cols
+        if self._ranks is None or self._ranks[0] != rows or self._ranks[1] != cols:
+            self._ranks = (rows, cols, self.square_ranks(rows, cols))
+        return self._ranks[2]
+
+    # a secondary sort key tie_break(board, move) for the moves tied for the
+    # fewest onward moves, for subclasses whose tie-break depends on the
+    # position. None sorts ties by their square's rank from square_ranks
+    tie_break = None
+
+    def order(self, board, moves):
+        """sort the moves best candidate first"""
+        if len(moves) < 2:
+            return moves
+        count = board.count_moves_from
+        moves.sort(key=count)
+        best = count(moves[0])
+        if count(moves[1]) != best:
+            return moves
+        tied = 2
+        while tied < len(moves) and count(moves[tied]) == best:
+            tied += 1
+        tie_break = self.tie_break
+        if tie_break is None:
+            ranks = self.ranks(board)
+            cols = board.cols
+            moves[:tied] = sorted(moves[:tied], key=lambda move: ranks[move[0] * cols + move[1]])
+        else:
+            moves[:tied] = sorted(moves[:tied], key=lambda move: tie_break(board, move))
+        return moves
+
+
+class Pohl(Warnsdorff):
+    """Warnsdorff's rule, ties broken by Pohl's rule
+
+    of the tied moves, prefer the one whose best onward square has the
+    fewest moves left, Warnsdorff's rule applied one level down. moves
+    still tied go by their squares' ranks
+    """
+    def tie_break(self, board, move):
+        onward = [board.count_moves_from(square) for square in board.get_available_moves_from(move)]
+        x, y = move
+        return (min(onward, default=8), self.ranks(board)[x * board.cols + y])
+
+
+class Roth(Warnsdorff):
+    """Warnsdorff's rule, ties broken by Roth's furthest-from-centre rule"""
+    def square_ranks(self, rows, cols, edge=False):
+        return super().square_ranks(rows, cols, edge)
+
+
+class FixedOrder(Warnsdorff):
+    """Warnsdorff's rule, ties by the squares' ranks and then a fixed move order
+
+    moves the ranks can't separate, mirror images of each other, go by the
+    position of their (dx, dy) step in `move_order`. a fixed order isn't
+    enough on its own to finish big boards, it gives up on 333x333 from
+    the corner, and this is not Squirrel and Cull's algorithm, whose
+    orders change with the board size and partway through the tour
+    """
+    MOVE_ORDER = [(1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1)]
+
+    def __init__(self, backtrack=True, move_order=None):
+        super().__init__(backtrack)
+        self.move_order = list(move_order or self.MOVE_ORDER)
+        if sorted(self.move_order) != sorted(OFFSETS):
+            raise ValueError("move_order must be a permutation of the eight knight moves")
+        self._rank = {step: rank for rank, step in enumerate(self.move_order)}
+
+    def tie_break(self, board, move):
+        x, y = move
+        return (self.ranks(board)[x * board.cols + y], self._rank[(x - board.x, y - board.y)])
+
+
+class Randomized(Warnsdorff):
+    """Warnsdorff's rule, ties broken at random
+
+    different seeds explore the tree in different orders, which is useful
+    for restarts and for racing several searches against each other
+    """
+    def __init__(self, backtrack=True, seed=None):
+        super().__init__(backtrack)
+        self.seed = seed
+        self._random = random.Random(seed)
+
+    def tie_break(self, board, move):
+        return self._random.random()
+
+
+STRATEGIES = {
+    'warnsdorff': Warnsdorff,
+    'pohl': Pohl,
+    'roth': Roth,
+    'fixed-order': FixedOrder,
+    'random': Randomized,
+}
+
+
+def get_strategy(strategy=None):
+    """turn a strategy name (or None for the default) into a strategy object"""
+    if strategy is None:
+        return Warnsdorff()
+    if isinstance(strategy, str):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {sorted(STRATEGIES)}")
+        return STRATEGIES[strategy]()
+    return strategy
+
+
+class SearchStats:
+    """counters and timings for the solver's search, pass one to Knight
+
+    nodes counts every move the search makes, backtracks the moves it takes
+    back once everything below them has failed, and prune_hits the moves
+    cut off straight away, by reason. band_seconds is the time spent at each
+    band of band_width depths, so it shows where in the tree a slow search
+    is stuck. on_move(x, y, depth) and on_undo(x, y, depth) are optional
+    callbacks for every move made and taken back.
+
+    the solver skips all of this when it has no stats object, so leaving it
+    off costs nothing.
+    """
+
+    def __init__(self, band_width=8, on_move=None, on_undo=None):
+        self.band_width = band_width
+        self.on_move = on_move
+        self.on_undo = on_undo
+        self.reset()
+
+    def reset(self):
+        """zero every counter"""
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.tours = 0
+        self.prune_hits = {}
+        self.band_seconds = {}
+        self._band = 0
+        self._clock = None
+
+    def begin(self, depth):
+        """called as a search starts at the given depth"""
+        self._band = depth // self.band_width
+        self._clock = time.perf_counter()
+
+    def _tick(self, depth):
+        """charge the time since the last event to the band it was spent in"""
+        now = time.perf_counter()
+        band = self._band
+        self.band_seconds[band] = self.band_seconds.get(band, 0.0) + now - self._clock
+        self._clock = now
+        self._band = depth // self.band_width
+
+    def moved(self, x, y, depth):
+        """the search moved to (x, y), depth moves from the start"""
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self._tick(depth)
+        if self.on_move is not None:
+            self.on_move(x, y, depth)
+
+    def undone(self, x, y, depth, reason=None):
+        """the search took back its move to (x, y), reason names the check
+        that cut the move off, is None for a backtrack, or 'stopped' when the
+        search was stopped and is putting the board back, which counts as
+        neither"""
+        if reason is None:
+            self.backtracks += 1
+        elif reason != 'stopped':
+            self.prune_hits[reason] = self.prune_hits.get(reason, 0) + 1
+        self._tick(depth - 1)
+        if self.on_undo is not None:
+            self.on_undo(x, y, depth)
+
+    @property
+    def seconds(self):
+        """total time spent searching"""
+        return sum(self.band_seconds.values())
+
+    def to_dict(self):
+        """the counters as plain data"""
+        width = self.band_width
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'tours': self.tours,
+            'prune_hits': dict(self.prune_hits),
+            'seconds': self.seconds,
+            'band_seconds': {f"{band * width}-{band * width + width - 1}": seconds
+                             for band, seconds in sorted(self.band_seconds.items())},
+        }
+
+    def to_json(self, **kwargs):
+        """the counters as a JSON string, kwargs go to json.dumps"""
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+class SolveResult:
+    """the outcome of a solve, truthy only when a tour was found
+
+    status is 'solved', 'no tour' (the search was exhaustive), 'gave up' (a
+    linear search hit a dead end), 'timeout', 'node limit', 'cancelled' or
+    'no start'. path is the tour when solved and otherwise the longest
+    partial path the search reached. nodes and seconds are the work it took.
+    """
+
+    def __init__(self, status='no tour', path=None, nodes=0, seconds=0.0):
+        self.status = status
+        self.path = path if path is not None else []
+        self.nodes = nodes
+        self.seconds = seconds
+
+    def __bool__(self):
+        return self.status == 'solved'
+
+    def __repr__(self):
+        return (f"SolveResult({self.status!r}, {len(self.path)} squares, "
+                f"{self.nodes} nodes, {self.seconds:.3f}s)")
+
+
 class Knight:
-    def __init__(self, N=8, M=7):
-        self.board = Board(N, M)
+    def __init__(self, N=8, M=7, board_cls=None, strategy=None, transposition=None, prune=False,
+                 cache=None, stats=None, progress=None, events=None, donate=None, donate_every=1 << 16):
+        """board_cls picks the board backend, e.g. bitboard.BitBoard
+
+        strategy is the move ordering used by the solver, either a name from
+        STRATEGIES or a strategy object such as Roth(backtrack=False)
+
+        transposition is an optional transposition.TranspositionTable for
+        the same board size, used to cut off states already known to fail
+
+        prune turns on the dead position checks at every node: no unvisited
+        square left unreachable, at most one square the tour could only end
+        on, and the unvisited squares still in one connected region
+
+        cache is an optional cache.SolutionCache, solve and solve_closed_tour
+        look the start square up there first and store what they find
+
+        stats is an optional SearchStats that the search reports into
+
+        progress is an optional function progress(nodes, depth, best_depth)
+        called every CHECK_EVERY nodes while a solve runs, it may be called
+        from whichever thread is solving
+
+        events is an optional collections.deque, best with a maxlen so it
+        works as a ring buffer. the search appends x * cols + y for every
+        move and ~(x * cols + y) for every move taken back, which is cheap
+        enough to watch a search live from another thread
+
+        donate is an optional function donate(prefixes) for sharing a search
+        out. every donate_every nodes the search gives away the untried moves
+        of the shallowest square on its path that has any, as the move lists
+        from the start square that lead to them in the order it would have
+        tried them, and carries on without them
+        """
+        self.board = (board_cls or Board)(N, M)
+        self.strategy = get_strategy(strategy)
+        self.transposition = transposition
+        self.prune = prune
+        self.cache = cache
+        self.stats = stats
+        self.progress = progress
+        self.events = events
+        self.donate = donate
+        self.donate_every = donate_every
+        self.end = None  # optional fixed final square, see set_end_position
+        self._cancelled = False  # set by cancel, checked by the search every CHECK_EVERY nodes
+
+    def set_strategy(self, strategy):
+        """Change the move ordering used by the solver"""
+        self.strategy = get_strategy(strategy)
 
     def set_start_position(self, x, y):
         """Set the starting position for the knight"""
         return self.board.set_start_position(x, y)
 
+    def set_end_position(self, x, y):
+        """Fix the square the tour has to finish on"""
+        if 0 <= x < self.board.rows and 0 <= y < self.board.cols:
+            self.end = (x, y)
+            return True
+        return False
+
+    def clear_end_position(self):
+        """Let the tour finish on any square again"""
+        self.end = None
+
     def move(self, x, y):
         """move the knight to a new square"""
         return self.board.move(x, y)
         
-    def solve_closed_tour(self):
-        """Solve for a closed knight's tour"""
+    def solve_closed_tour(self, timeout=None, max_nodes=None):
+        """Solve for a closed knight's tour, see solve for the budgets"""
         # Check if start position has been set
         if not self.board.moves:
-            return False
+            return SolveResult('no start')
             
-        return self._solve(True)
+        return self._cached_solve(True, timeout, max_nodes)
     
-    def solve(self):
-        """Solve for an open knight's tour"""
+    def solve(self, timeout=None, max_nodes=None):
+        """Solve for an open knight's tour
+
+        timeout (in seconds) and max_nodes bound the search, and cancel()
+        stops it from another thread. returns a SolveResult, which is true
+        only when a tour was found. when the search stops early the board
+        is put back as it was and the result holds the longest partial path
+        """
         # Check if start position has been set
         if not self.board.moves:
-            return False
+            return SolveResult('no start')
             
-        return self._solve(False)
-        
-    def _solve(self, tour=False):
-        """Solve the knight's tour using Warnsdorff's heuristic"""
-        # Check if we've visited all cells
-        total_cells = self.board.rows * self.board.cols
-        
-        if self.board.moveCount == total_cells - 1:
-            # We're visiting the last cell
-            if not tour:
-                return True
-                
-            # For closed tour, check if we can get back to start
-            last_x, last_y = self.board.x, self.board.y
-            dx = abs(last_x - self.board.start_x)
-            dy = abs(last_y - self.board.start_y)
-            if (dx == 2 and dy == 1) or (dx == 1 and dy == 2):
-                return True
+        return self._cached_solve(False, timeout, max_nodes)
+
+    def cancel(self):
+        """Stop the solve running in another thread at its next check
+
+        solve and iter_tours clear it when they start, so a cancel made
+        while nothing is solving has no effect
+        """
+        self._cancelled = True
+
+    def construct_closed_tour(self):
+        """Build a closed tour from the start position without searching
+
+        stitches known tours of small blocks together (see construct.py), so
+        it runs in O(rows*cols) and suits very large boards. needs an even
+        number of squares and both sides at least 5, raises ValueError
+        otherwise.
+        """
+        # Check if start position has been set
+        if not self.board.moves:
             return False
+
+        from construct import closed_tour
+
+        start_x, start_y = self.board.start_x, self.board.start_y
+        tour = closed_tour(self.board.rows, self.board.cols, (start_x, start_y))
+
+        self._replay(tour)
+        return True
+
+    def _replay(self, tour):
+        """play a finished tour onto the board so it ends up exactly as after a solve"""
+        self.board.reset()
+        self.board.set_start_position(*tour[0])
+        for x, y in tour[1:]:
+            self.board.move(x, y)
+
+    def _cached_solve(self, tour, timeout=None, max_nodes=None):
+        """_solve, going through the solution cache when there is one"""
+        board = self.board
+        # only whole tours from a bare start square are cached
+        if self.cache is None or self.end is not None or len(board.moves) != 1:
+            return self._solve(tour, timeout, max_nodes)
+
+        key = (board.rows, board.cols, (board.start_x, board.start_y), tour)
+        cached = self.cache.get(*key)
+        if cached is not None:
+            if cached:
+                self._replay(cached)
+                return SolveResult('solved', list(board.moves))
+            return SolveResult('no tour', list(board.moves))
+
+        result = self._solve(tour, timeout, max_nodes)
+        if result:
+            self.cache.put(*key, result.path)
+        elif result.status == 'no tour':
+            # an exhaustive search came up empty, so there is no tour at all
+            self.cache.put(*key, [])
+        return result
         
-        # Warnsdorff's heuristic: sort moves by fewest onward moves
-        moves = self.board.get_available_moves()
-        if not moves:
+    def _ordered_moves(self):
+        """Available moves from the knight's square, best candidate last"""
+        moves = self.strategy.order(self.board, self.board.get_available_moves())
+        if not self.strategy.backtrack:
+            # linear mode, only the best candidate is ever tried
+            del moves[1:]
+        # reverse so the stack can pop the best candidate off the end
+        moves.reverse()
+        return moves
+
+    def iter_tours(self, closed=False):
+        """Yield every tour from the start position, one at a time
+
+        tours are generated lazily as lists of moves, so only the current
+        search path is held in memory. once the generator is exhausted the
+        board is back at the start position.
+        """
+        # Check if start position has been set
+        if not self.board.moves:
+            return
+
+        self._cancelled = False
+        for _ in self._search(closed):
+            yield list(self.board.moves)
+
+    def count_tours(self, closed=False):
+        """Count the tours from the knight's position without building them
+
+        runs its own dfs over flat square indices and never touches
+        Board.moves. tours are counted as move sequences, so every closed
+        tour is counted once in each direction.
+        """
+        board = self.board
+        # Check if start position has been set
+        if not board.moves:
+            return 0
+
+        rows, cols = board.rows, board.cols
+        size = rows * cols
+        visited = bytearray(size)
+        for x in range(rows):
+            for y in range(cols):
+                visited[x * cols + y] = board.get_cell(x, y).visited
+        neighbours = [tuple((x + dx) * cols + y + dy for dx, dy in OFFSETS
+                            if 0 <= x + dx < rows and 0 <= y + dy < cols)
+                      for x in range(rows) for y in range(cols)]
+        start = board.start_x * cols + board.start_y
+        returns = set(neighbours[start])
+
+        remaining = size - sum(visited)
+        if remaining == 0:
+            current = board.x * cols + board.y
+            return 1 if not closed or current in returns else 0
+
+        count = 0
+        path = [board.x * cols + board.y]
+        next_index = [0]
+        while path:
+            square_neighbours = neighbours[path[-1]]
+            i = next_index[-1]
+            if i == len(square_neighbours):
+                # every move from this square has been tried, step back
+                next_index.pop()
+                square = path.pop()
+                if path:
+                    visited[square] = 0
+                    remaining += 1
+                continue
+
+            next_index[-1] = i + 1
+            square = square_neighbours[i]
+            if visited[square]:
+                continue
+            if remaining == 1:
+                # the last square completes a tour
+                if not closed or square in returns:
+                    count += 1
+                continue
+            visited[square] = 1
+            remaining -= 1
+            path.append(square)
+            next_index.append(0)
+
+        return count
+
+    def _count_dead_ends(self):
+        """Count the unvisited squares a tour could only end on
+
+        a square is a dead end when it has one way in left, counting the
+        knight's own square, so it can be entered but never left. the search
+        only calls this once and keeps the count up to date move by move
+        """
+        board = self.board
+        beside_knight = board.get_available_moves()
+        if min(board.rows, board.cols) >= 3 and (board.rows, board.cols) != (3, 3):
+            # every square starts with two moves or more, so a dead end has
+            # lost one to a visited square and only those neighbours count
+            squares = {square for move in board.moves
+                       for square in board.get_available_moves_from(move)}
+        else:
+            squares = [(x, y) for x in range(board.rows) for y in range(board.cols)
+                       if not board.get_cell(x, y).visited]
+        count = 0
+        for square in squares:
+            links = board.count_moves_from(square) + (square in beside_knight)
+            if links == 1:
+                count += 1
+        return count
+
+    def _is_dead_end(self, square):
+        """Check if an unvisited square has exactly one way in left"""
+        board = self.board
+        dx = abs(board.x - square[0])
+        dy = abs(board.y - square[1])
+        beside_knight = (dx == 2 and dy == 1) or (dx == 1 and dy == 2)
+        return board.count_moves_from(square) + beside_knight == 1
+
+    def _check_move(self, previous):
+        """Check the knight's last move, made from previous, for dead ends
+
+        returns the change in the number of dead end squares and whether an
+        unvisited square has been cut off completely. only the neighbours of
+        the square the knight left lose a way in, the knight's new neighbours
+        lose one but gain the knight's square in its place.
+        """
+        board = self.board
+        delta = 0
+        if board.count_moves_from((board.x, board.y)) == 0:
+            # the knight stepped onto a dead end
+            delta -= 1
+        isolated = False
+        for square in board.get_available_moves_from(previous):
+            links = board.count_moves_from(square)
+            if links == 1:
+                delta += 1
+            elif links == 0:
+                delta -= 1
+                isolated = True
+        return delta, isolated
+
+    def _region_split(self):
+        """Check if the unvisited squares next to the knight lie in separate
+        regions, whichever one it moves into the others can't be reached
+
+        Warnsdorff-style ordering leaves the knight on squares with few ways
+        out, so there are rarely more than two squares to join up
+        """
+        board = self.board
+        around_knight = board.get_available_moves()
+        if len(around_knight) < 2:
             return False
-            
-        # Sort by the number of onward moves (fewer options first)
-        moves.sort(key=lambda move: len(self.board.get_available_moves_from(move)))
-        
-        for move_x, move_y in moves:
-            if self.board.move(move_x, move_y):
-                if self._solve(tour):
-                    return True
-                self.board.undo_move()
-        
+        # squares already known to be in the first square's region
+        region = set(around_knight[:1])
+        region.update(board.get_available_moves_from(around_knight[0]))
+        for square in around_knight[1:]:
+            neighbours = board.get_available_moves_from(square)
+            # quick local test, it shares an unvisited neighbour with the region
+            if not region.intersection(neighbours) and not self._connected(square, region):
+                return True
+            region.add(square)
+            region.update(neighbours)
         return False
 
+    def _connected(self, square, targets):
+        """Check if square reaches one of targets over unvisited squares
+
+        searches from both ends a layer at a time, growing whichever side
+        has the smaller frontier, so a region that has been cut off costs
+        about its own size rather than the whole board
+        """
+        board = self.board
+        ours, theirs = {square}, set(targets)
+        our_frontier, their_frontier = [square], list(targets)
+        while our_frontier and their_frontier:
+            if len(our_frontier) > len(their_frontier):
+                ours, theirs = theirs, ours
+                our_frontier, their_frontier = their_frontier, our_frontier
+            next_frontier = []
+            for current in our_frontier:
+                for neighbour in board.get_available_moves_from(current):
+                    if neighbour in theirs:
+                        return True
+                    if neighbour not in ours:
+                        ours.add(neighbour)
+                        next_frontier.append(neighbour)
+            our_frontier = next_frontier
+        return False
+
+    def _solve(self, tour=False, timeout=None, max_nodes=None):
+        """Solve the knight's tour using the knight's move ordering strategy"""
+        began = time.perf_counter()
+        deadline = None if timeout is None else began + timeout
+        result = SolveResult()
+        self._cancelled = False
+        search = self._search(tour, deadline, max_nodes, result)
+        try:
+            # leave the board on the first tour found
+            for _ in search:
+                result.status = 'solved'
+                result.path = list(self.board.moves)
+                break
+        finally:
+            search.close()
+            self._cancelled = False
+        if result.status == 'no tour' and not self.strategy.backtrack:
+            result.status = 'gave up'
+        result.seconds = time.perf_counter() - began
+        return result
+
+    def _search(self, tour=False, deadline=None, max_nodes=None, result=None):
+        """Search for tours from the knight's position using its move ordering
+
+        a generator that stops with the board on each tour it finds and
+        resumes the search when advanced. the search is an iterative dfs
+        over an explicit stack of frames, so the board size is not limited
+        by the interpreter's recursion depth
+
+        deadline (a time.perf_counter time), max_nodes and cancel() end the
+        search early. result, a SolveResult, is kept up to date with the
+        node count, the longest path reached and the reason for stopping
+        """
+        board = self.board
+        last_move = board.rows * board.cols - 1
+        start_x, start_y = board.start_x, board.start_y
+        start = (start_x, start_y)
+        end = self.end
+
+        if board.moveCount == last_move:
+            dx = abs(board.x - start_x)
+            dy = abs(board.y - start_y)
+            if ((not tour or (dx == 2 and dy == 1) or (dx == 1 and dy == 2))
+                    and (end is None or end == (board.x, board.y))):
+                yield
+            return
+        if end is not None:
+            if board.get_cell(*end).visited:
+                # the end square has been used up before the last move
+                return
+            if (board.x + board.y + end[0] + end[1] + last_move - board.moveCount) % 2:
+                # every move changes square colour, so the end square has to
+                # be the colour the knight is on after the remaining moves
+                return
+
+        # dead states are only recorded when every candidate is searched
+        table = self.transposition
+        record = table is not None and self.strategy.backtrack
+        if table is not None:
+            table.load(board)
+            key_start = start if tour else None
+        # the bottom tour_depth frames have had a tour found below them, or
+        # moves given away by donate, so they are not recorded as dead
+        tour_depth = 0
+        prune = self.prune
+        dead_ends = self._count_dead_ends() if prune else 0
+
+        stats = self.stats
+        if stats is not None:
+            stats.begin(board.moveCount)
+        # bound once, this runs for every move and undo
+        emit = None if self.events is None else self.events.append
+        cols = board.cols
+        base_depth = board.moveCount
+        best_depth = base_depth
+        if result is not None:
+            result.path = list(board.moves)
+        nodes = 0
+        check_at = CHECK_EVERY if max_nodes is None else min(CHECK_EVERY, max_nodes)
+        donate = self.donate
+        donate_at = self.donate_every
+
+        # frames are (square, remaining candidates, state key, dead end change)
+        stack = [((board.x, board.y), self._ordered_moves(), None, 0)]
+        while stack:
+            frame = stack[-1]
+            candidates = frame[1]
+            if not candidates:
+                # every move from this square failed, step back
+                stack.pop()
+                if stack:
+                    if len(stack) < tour_depth:
+                        tour_depth = len(stack)
+                    elif record:
+                        table.add_dead(frame[2])
+                    if table is not None:
+                        table.unvisit(board.x, board.y)
+                    if prune:
+                        dead_ends -= frame[3]
+                    if board.moveCount > best_depth:
+                        # on the way back from the deepest point yet
+                        best_depth = board.moveCount
+                        if result is not None:
+                            result.path = list(board.moves)
+                    if stats is not None:
+                        stats.undone(board.x, board.y, board.moveCount)
+                    if emit is not None:
+                        emit(~(board.x * cols + board.y))
+                    board.undo_move()
+                continue
+
+            move_x, move_y = candidates.pop()
+            if not board.move(move_x, move_y):
+                continue
+            if stats is not None:
+                stats.moved(move_x, move_y, board.moveCount)
+            if emit is not None:
+                emit(move_x * cols + move_y)
+
+            nodes += 1
+
+            if board.moveCount == last_move:
+                # We're visiting the last cell
+                dx = abs(move_x - start_x)
+                dy = abs(move_y - start_y)
+                if end is not None and end != (move_x, move_y):
+                    pass  # the tour has to finish on the end square
+                elif not tour or (dx == 2 and dy == 1) or (dx == 1 and dy == 2):
+                    # For closed tour, check if we can get back to start
+                    tour_depth = len(stack)
+                    if stats is not None:
+                        stats.tours += 1
+                    if result is not None:
+                        result.nodes = nodes
+                    yield
+                elif board.moveCount > best_depth:
+                    best_depth = board.moveCount
+                    if result is not None:
+                        result.path = list(board.moves)
+                if stats is not None:
+                    stats.undone(move_x, move_y, board.moveCount)
+                if emit is not None:
+                    emit(~(move_x * cols + move_y))
+                board.undo_move()
+                continue
+
+            if nodes >= check_at:
+                check_at = nodes + CHECK_EVERY
+                if self.progress is not None:
+                    self.progress(nodes, board.moveCount, best_depth)
+                stopped = None
+                if self._cancelled:
+                    stopped = 'cancelled'
+                elif deadline is not None and time.perf_counter() >= deadline:
+                    stopped = 'timeout'
+                elif max_nodes is not None:
+                    if nodes >= max_nodes:
+                        stopped = 'node limit'
+                    check_at = min(check_at, max_nodes)
+                if stopped is not None:
+                    if result is not None:
+                        if board.moveCount > best_depth:
+                            result.path = list(board.moves)
+                        result.status = stopped
+                        result.nodes = nodes
+                    # put the board back as the search found it, the moves
+                    # taken back are reported but not counted as backtracks
+                    while board.moveCount > base_depth:
+                        if stats is not None:
+                            stats.undone(board.x, board.y, board.moveCount, 'stopped')
+                        if emit is not None:
+                            emit(~(board.x * cols + board.y))
+                        board.undo_move()
+                    return
+                if donate is not None and nodes >= donate_at:
+                    donate_at = nodes + self.donate_every
+                    # the shallowest untried moves head the biggest subtrees
+                    for depth, frame in enumerate(stack):
+                        if frame[1]:
+                            path = list(board.moves)[1:base_depth + depth + 1]
+                            donate([path + [move] for move in reversed(frame[1])])
+                            frame[1].clear()
+                            tour_depth = max(tour_depth, depth + 1)
+                            break
+
+            # the name of the check that cuts this move off, if any
+            pruned = None
+            delta = 0
+            if tour and board.count_moves_from(start) == 0:
+                # a closed tour has to keep one unvisited neighbour of the
+                # start square in reserve for the last move
+                pruned = 'start reserve'
+            elif end is not None:
+                # the end square is only for the last move, and it has to
+                # keep a way in from an unvisited square or the knight
+                dx = abs(move_x - end[0])
+                dy = abs(move_y - end[1])
+                if (move_x, move_y) == end or (
+                        board.count_moves_from(end) == 0 and not ((dx == 2 and dy == 1) or (dx == 1 and dy == 2))):
+                    pruned = 'end square'
+            if prune and pruned is None:
+                delta, isolated = self._check_move(frame[0])
+                if isolated:
+                    pruned = 'isolated'
+                elif (dead_ends + delta > 1
+                        or (end is not None and dead_ends + delta == 1 and not self._is_dead_end(end))):
+                    pruned = 'dead ends'
+                elif self._region_split():
+                    pruned = 'region split'
+
+            key = None
+            if table is not None and pruned is None:
+                table.visit(move_x, move_y)
+                key = table.key(move_x, move_y, key_start, end)
+                if table.is_dead(key):
+                    # this state (or a mirror image of it) is already known to fail
+                    table.unvisit(move_x, move_y)
+                    pruned = 'transposition'
+
+            if pruned is not None:
+                if stats is not None:
+                    stats.undone(move_x, move_y, board.moveCount, pruned)
+                if emit is not None:
+                    emit(~(move_x * cols + move_y))
+                board.undo_move()
+                continue
+
+            dead_ends += delta
+            stack.append(((move_x, move_y), self._ordered_moves(), key, delta))
+
+        if result is not None:
+            result.nodes = nodes
+
 if __name__ == '__main__':
     # Test the knight's tour solver
     knight = Knight(5, 5)
     knight.set_start_position(0, 0)
     
-    if knight.solve_closed_tour():
+    result = knight.solve_closed_tour(timeout=30)
+    if result:
         print("Solution found!")
         knight.board.printBoard()
         knight.board.printMoves()
+    elif result.status == 'no tour':
+        print("No solution exists from the given starting position")
     else:
-        print("No solution exists from the given starting position")
\ No newline at end of file
+        print(f"Stopped early ({result.status}), longest path found: {result.path}")
\ No newline at end of file
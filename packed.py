@@ -0,0 +1,143 @@
+"""packed.py
+a compact binary format for knights tours
+
+a tour is stored as a small header (board size, start square and number of
+steps) followed by one 3-bit direction code per step, the index of the move
+in knight.OFFSETS, packed eight to every three bytes. that is 3/8 of a byte
+a move, so a 1000x1000 tour takes about 375KB.
+
+the writer and reader stream squares one at a time and never hold the whole
+tour as a list, several tours can be written one after another to the same
+file.
+"""
+
+import io
+import struct
+
+from knight import OFFSETS
+
+HEADER = struct.Struct('<HHHHI')  # rows, cols, start x, start y, steps
+CODES = {offset: code for code, offset in enumerate(OFFSETS)}
+CHUNK = 3 << 12  # bytes read or written at a time, a whole number of 8 code groups
+
+
+class TourWriter:
+    def __init__(self, f, rows, cols, start):
+        """start a tour from start on a rows x cols board in the binary file f
+
+        f has to be seekable, the step count in the header is filled in by
+        close
+        """
+        self.f = f
+        self.header_at = f.tell()
+        self.rows = rows
+        self.cols = cols
+        self.start = start
+        self.x, self.y = start
+        self.steps = 0
+        self.bits = 0  # codes not yet written, the oldest in the lowest bits
+        self.buffer = bytearray()
+        f.write(HEADER.pack(rows, cols, start[0], start[1], 0))
+
+    def write(self, x, y):
+        """add the next square of the tour, a knight's move from the last one"""
+        code = CODES.get((x - self.x, y - self.y))
+        if code is None:
+            raise ValueError(f"({x}, {y}) is not a knight's move from ({self.x}, {self.y})")
+        self.x, self.y = x, y
+        self.bits |= code << (3 * (self.steps & 7))
+        self.steps += 1
+        if not self.steps & 7:
+            self.buffer += self.bits.to_bytes(3, 'little')
+            self.bits = 0
+            if len(self.buffer) >= CHUNK:
+                self.f.write(self.buffer)
+                self.buffer.clear()
+
+    def close(self):
+        """write out the last codes and the step count"""
+        left = self.steps & 7
+        if left:
+            self.buffer += self.bits.to_bytes((3 * left + 7) // 8, 'little')
+        self.f.write(self.buffer)
+        self.buffer.clear()
+        end = self.f.tell()
+        self.f.seek(self.header_at)
+        self.f.write(HEADER.pack(self.rows, self.cols, self.start[0], self.start[1], self.steps))
+        self.f.seek(end)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TourReader:
+    def __init__(self, f):
+        """read the header of the next tour in the binary file f"""
+        self.f = f
+        self.rows, self.cols, start_x, start_y, self.steps = HEADER.unpack(f.read(HEADER.size))
+        self.start = (start_x, start_y)
+
+    def __len__(self):
+        """number of squares in the tour, counting the start"""
+        return self.steps + 1
+
+    def __iter__(self):
+        """yield the squares of the tour in order, starting with the start
+
+        leaves f just past the tour so the next one can be read
+        """
+        x, y = self.start
+        yield x, y
+        remaining = (3 * self.steps + 7) // 8
+        steps = self.steps
+        while remaining:
+            chunk = self.f.read(min(CHUNK, remaining))
+            if not chunk:
+                raise ValueError("packed tour is truncated")
+            remaining -= len(chunk)
+            for i in range(0, len(chunk), 3):
+                bits = int.from_bytes(chunk[i:i + 3], 'little')
+                for _ in range(min(8, steps)):
+                    dx, dy = OFFSETS[bits & 7]
+                    bits >>= 3
+                    x += dx
+                    y += dy
+                    yield x, y
+                steps -= 8
+
+
+def write_tour(f, rows, cols, tour):
+    """write a tour given as any iterable of squares, start first"""
+    squares = iter(tour)
+    with TourWriter(f, rows, cols, next(squares)) as writer:
+        for x, y in squares:
+            writer.write(x, y)
+
+
+def encode(tour, rows, cols):
+    """a tour as packed bytes"""
+    f = io.BytesIO()
+    write_tour(f, rows, cols, tour)
+    return f.getvalue()
+
+
+def decode(data):
+    """the list of squares in a packed tour"""
+    return list(TourReader(io.BytesIO(data)))
+
+
+if __name__ == '__main__':
+    # Pack a tour of a large board and compare it with the plain list
+    import sys
+    import time
+    from construct import closed_tour
+
+    tour = closed_tour(200, 200)
+    began = time.perf_counter()
+    data = encode(tour, 200, 200)
+    print(f"packed {len(tour)} squares into {len(data)} bytes in {time.perf_counter() - began:.3f}s")
+    print(f"the list of tuples takes about {sys.getsizeof(tour) + len(tour) * sys.getsizeof(tour[0])} bytes")
+    assert decode(data) == tour
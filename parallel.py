@@ -0,0 +1,178 @@
+"""parallel.py
+exhaustive knights tour search split across a pool of processes
+input: board size, starting square and tour type
+output: the same tour the sequential solver finds, or None if there is none
+
+the search tree is cut at a fixed depth into independent prefix jobs, one
+per node at that depth, and every idle worker takes the next unexplored
+one. a subtree can be far bigger than the rest, so a worker that passes
+its node budget donates the untried moves of the shallowest square on its
+path back to the shared queue as new jobs, and keeps searching what is
+left below. idle workers pick those up ahead of the later jobs.
+
+every job has a key that sorts in the order the sequential search would
+reach it: the split jobs are numbered, and the n-th donation from the job
+keyed k is keyed k + (-n, i), after what the donor kept (k itself) but
+before its earlier donations, which sit higher up its path. the answer is
+the tour of the smallest key once no job with a smaller key is left, so
+it is deterministic and matches Knight.solve / solve_closed_tour.
+
+with a single process there is nothing to share the work with, and the
+split only adds the replayed prefixes and the pool, so parallel_solve
+runs the sequential solver instead.
+"""
+
+import heapq
+import multiprocessing
+
+from knight import Knight
+
+
+def split(knight, depth, closed=False):
+    """the move prefixes at the given depth below the knight's position
+
+    prefixes come out in the order the sequential search visits them.
+    branches that complete the board or dead-end before reaching the depth
+    are kept as shorter prefixes (or dropped, for dead ends) so no part of
+    the tree is lost. moves the sequential search would cut off, using up
+    the start square's last way back on a closed tour or the end square
+    before the last move, are dropped here too, as is every prefix when the
+    end square is the wrong colour to finish on.
+    """
+    board = knight.board
+    last_move = board.rows * board.cols - 1
+    start = (board.start_x, board.start_y)
+    end = knight.end
+    if end is not None and (board.x + board.y + end[0] + end[1] + last_move - board.moveCount) % 2:
+        # every move changes square colour, and that doesn't change on the way down
+        return []
+    prefixes = []
+    prefix = []
+
+    def pruned():
+        """whether the search would cut off the move the knight just made"""
+        if closed and board.count_moves_from(start) == 0:
+            return True
+        if end is not None:
+            dx = abs(board.x - end[0])
+            dy = abs(board.y - end[1])
+            return (board.x, board.y) == end or (
+                board.count_moves_from(end) == 0 and not ((dx == 2 and dy == 1) or (dx == 1 and dy == 2)))
+        return False
+
+    def walk():
+        if len(prefix) == depth or board.moveCount == last_move:
+            prefixes.append(list(prefix))
+            return
+        # _ordered_moves keeps the best candidate last
+        for move in reversed(knight._ordered_moves()):
+            if board.move(*move):
+                if board.moveCount == last_move or not pruned():
+                    prefix.append(move)
+                    walk()
+                    prefix.pop()
+                board.undo_move()
+
+    walk()
+    return prefixes
+
+
+_messages = None  # the queue workers report to, set by _init_worker
+
+
+def _init_worker(messages):
+    global _messages
+    _messages = messages
+
+
+def _search(job):
+    """worker, replay a prefix and search the subtree below it
+
+    donations and the outcome go back through the same queue, so the
+    donations always arrive before the job is reported done
+    """
+    key, rows, cols, start, end, closed, strategy, budget, prefix = job
+    donations = 0
+
+    def donate(prefixes):
+        nonlocal donations
+        donations += 1
+        _messages.put(('donated', key, donations, prefixes))
+
+    try:
+        knight = Knight(rows, cols, strategy=strategy, donate=donate, donate_every=budget)
+        knight.set_start_position(*start)
+        if end is not None:
+            knight.set_end_position(*end)
+        for move in prefix:
+            knight.move(*move)
+        solved = knight.solve_closed_tour() if closed else knight.solve()
+        _messages.put(('done', key, list(knight.board.moves) if solved else None))
+    except Exception as error:
+        _messages.put(('failed', key, error))
+
+
+def parallel_solve(rows, cols, start, closed=False, split_depth=4, processes=None, strategy=None,
+                   end=None, budget=50000):
+    """search for a tour with the work split across processes
+
+    returns the list of moves of the first tour in sequential search order,
+    or None once every subtree has been exhausted. end fixes the square the
+    tour finishes on, and budget is the number of nodes a worker searches
+    between donations. strategy must order moves deterministically (not
+    'random') for the answer to match the sequential solver. with one
+    process (or one cpu) it just runs the sequential solver
+    """
+    knight = Knight(rows, cols, strategy=strategy)
+    knight.set_start_position(*start)
+    if end is not None:
+        knight.set_end_position(*end)
+    processes = processes or multiprocessing.cpu_count()
+    if processes == 1:
+        solved = knight.solve_closed_tour() if closed else knight.solve()
+        return list(knight.board.moves) if solved else None
+
+    waiting = [((i,), prefix) for i, prefix in enumerate(split(knight, split_depth, closed))]
+    running = set()
+    best = None  # (key, tour) of the first tour in search order found so far
+
+    messages = multiprocessing.Queue()
+    with multiprocessing.Pool(processes, _init_worker, (messages,)) as pool:
+        while True:
+            # hand the earliest jobs to idle workers, none after a tour
+            while waiting and len(running) < processes:
+                key, prefix = heapq.heappop(waiting)
+                if best is not None and key > best[0]:
+                    waiting = []
+                    break
+                running.add(key)
+                pool.apply_async(_search, ((key, rows, cols, start, end, closed, strategy, budget, prefix),))
+            if not running:
+                return None if best is None else best[1]
+
+            kind, key, *rest = messages.get()
+            if kind == 'donated':
+                donation, prefixes = rest
+                for i, prefix in enumerate(prefixes):
+                    heapq.heappush(waiting, (key + (-donation, i), prefix))
+            elif kind == 'failed':
+                raise rest[0]
+            else:
+                running.remove(key)
+                tour = rest[0]
+                if tour is not None and (best is None or key < best[0]):
+                    best = key, tour
+                if best is not None and all(other > best[0] for other in running) and (
+                        not waiting or waiting[0][0] > best[0]):
+                    # nothing left can come before it
+                    return best[1]
+
+
+if __name__ == '__main__':
+    # Prove there is no closed tour on a 5x5 board from the corner
+    tour = parallel_solve(5, 5, (0, 0), closed=True)
+    if tour:
+        print("Solution found!")
+        print(tour)
+    else:
+        print("No solution exists from the given starting position")
@@ -0,0 +1,113 @@
+"""portfolio.py
+race several solver configurations against each other, one per process
+input: board size, starting square and tour type
+output: the tour from whichever configuration finishes first
+
+which move ordering is quickest depends heavily on the board and the start
+square, and a bad choice can take minutes where another takes milliseconds.
+racing a portfolio bounds the time to the quickest member.
+"""
+
+import multiprocessing
+import queue
+import time
+
+from construct import can_construct
+from knight import Knight, FixedOrder, Pohl, Randomized, Roth, Warnsdorff
+from packed import decode, encode
+
+
+def default_portfolio(rows, cols, closed=False):
+    """a mix of tie-breakers, randomised orderings and tour types
+
+    every entry is (label, method, strategy) where method names the Knight
+    method to call. a closed tour is also an open one, so open requests
+    race the closed tour searches as well.
+    """
+    portfolio = [
+        ('warnsdorff', 'solve', Warnsdorff()),
+        ('pohl', 'solve', Pohl()),
+        ('roth', 'solve', Roth()),
+        ('fixed-order', 'solve', FixedOrder()),
+        ('random-1', 'solve', Randomized(seed=1)),
+        ('random-2', 'solve', Randomized(seed=2)),
+        ('roth-closed', 'solve_closed_tour', Roth()),
+        ('random-closed', 'solve_closed_tour', Randomized(seed=3)),
+    ]
+    if closed:
+        portfolio = [entry for entry in portfolio if entry[1] != 'solve']
+    if can_construct(rows, cols):
+        portfolio.insert(0, ('construct', 'construct_closed_tour', None))
+    return portfolio
+
+
+def _run(index, rows, cols, start, method, strategy, results):
+    """worker process, solve with one configuration and report back"""
+    tour = None
+    try:
+        knight = Knight(rows, cols, strategy=strategy)
+        knight.set_start_position(*start)
+        try:
+            solved = getattr(knight, method)()
+        except ValueError:
+            solved = False
+        if solved:
+            # packed, a tour of a big board is far cheaper to send back that way
+            tour = encode(knight.board.moves, rows, cols)
+    finally:
+        # a configuration that crashed still reports, or race would wait for it forever
+        results.put((index, tour))
+
+
+def race(rows, cols, start, closed=False, portfolio=None, timeout=None):
+    """solve with every configuration at once and keep the first tour
+
+    returns a dict with the winning 'label', its 'tour' and the 'seconds'
+    taken, or None if every configuration failed or the timeout ran out.
+    the other processes are terminated as soon as there is a winner.
+    """
+    if portfolio is None:
+        portfolio = default_portfolio(rows, cols, closed)
+
+    began = time.perf_counter()
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_run, daemon=True,
+                                       args=(index, rows, cols, start, method, strategy, results))
+               for index, (label, method, strategy) in enumerate(portfolio)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        failed = 0
+        while failed < len(workers):
+            remaining = None if timeout is None else timeout - (time.perf_counter() - began)
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                index, tour = results.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if tour is None:
+                failed += 1
+                continue
+            return {
+                'label': portfolio[index][0],
+                'tour': decode(tour),
+                'seconds': time.perf_counter() - began,
+            }
+        return None
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == '__main__':
+    # Race the default portfolio for a closed tour on a 12x12 board
+    result = race(12, 12, (0, 0), closed=True, timeout=60)
+    if result:
+        print(f"{result['label']} won in {result['seconds']:.3f}s")
+        print(result['tour'])
+    else:
+        print("No configuration found a tour in time")
@@ -0,0 +1,284 @@
+"""service.py
+a local asyncio service that solves knight's tours in a process pool
+input: JSON lines over a unix socket or TCP, one request per line
+output: one JSON line per request, in the order they finish
+
+    python service.py --unix /tmp/knights.sock
+    python service.py --port 8765
+
+a request looks like a batch.py job and its "id" comes back in the answer:
+
+    {"id": 1, "rows": 8, "cols": 8, "start": [0, 0], "closed": true, "timeout": 5}
+
+the same solves are there for python callers as SolverService.solve. an
+identical request that arrives while one is being solved shares its
+computation, answers are kept in an LRU so repeats are free, and each
+request's timeout is both the solver's time budget in the worker and a
+deadline on the wait for it. a computation nobody is waiting for any more
+is cancelled in its worker through a flag in shared memory.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import submit_job
+from knight import STRATEGIES, Knight
+from packed import decode, encode
+
+CANCEL_SLOTS = 1024  # computations that can be cancelled at once, the rest just run out their budget
+FINAL = ('solved', 'no tour', 'gave up')  # results that do not depend on the budget
+MAX_SQUARES = 1 << 20  # the biggest board a request may ask for, 1024x1024
+
+_cancel_flags = None  # shared with the service, set in every worker by _init_worker
+
+
+def _init_worker(flags):
+    global _cancel_flags
+    _cancel_flags = flags
+
+
+def _solve(rows, cols, start, closed, strategy, timeout, max_nodes, slot):
+    """worker, solve one request and send the tour back packed"""
+    knight = Knight(rows, cols, strategy=strategy)
+    knight.set_start_position(*start)
+    if slot is not None:
+        flags = _cancel_flags
+
+        def progress(nodes, depth, best_depth):
+            if flags[slot]:
+                knight.cancel()
+        knight.progress = progress
+    if closed:
+        result = knight.solve_closed_tour(timeout, max_nodes)
+    else:
+        result = knight.solve(timeout, max_nodes)
+    return {
+        'status': result.status,
+        'tour': encode(result.path, rows, cols) if result else None,
+        'length': len(result.path),
+        'nodes': result.nodes,
+    }
+
+
+class _Computation:
+    def __init__(self, job, slot, deadline, max_nodes):
+        """one solve running (or queued) in the pool and the requests sharing it"""
+        self.job = job
+        self.future = asyncio.wrap_future(job)
+        self.slot = slot
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.waiters = 0
+
+    def covers(self, deadline, max_nodes):
+        """check if this computation runs at least as long as a new request
+        with these limits would need"""
+        return ((self.deadline is None or (deadline is not None and self.deadline >= deadline))
+                and (self.max_nodes is None or (max_nodes is not None and self.max_nodes >= max_nodes)))
+
+
+class SolverService:
+    def __init__(self, processes=None, cache_size=1024):
+        """a pool of processes solving requests, and an LRU of cache_size answers"""
+        self.flags = multiprocessing.RawArray('b', CANCEL_SLOTS)
+        self.free_slots = list(range(CANCEL_SLOTS))
+        self.processes = processes
+        self.pool = self._new_pool()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.in_flight = {}
+        self.counts = {'requests': 0, 'cached': 0, 'shared': 0, 'computed': 0, 'cancelled': 0}
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(self.processes, initializer=_init_worker, initargs=(self.flags,))
+
+    def close(self):
+        """stop every worker, whatever it is doing"""
+        for slot in range(CANCEL_SLOTS):
+            self.flags[slot] = 1
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def solve(self, rows, cols, start=(0, 0), closed=False, timeout=None, max_nodes=None,
+                    strategy=None):
+        """solve a board, sharing the work with identical requests
+
+        returns a dict with the 'status', the 'tour' when one was found, the
+        'length' of the longest path reached, 'nodes', 'seconds' and whether
+        the answer was 'cached' or 'shared'. raises ValueError for a request
+        that makes no sense
+        """
+        began = time.perf_counter()
+        rows, cols = int(rows), int(cols)
+        start = tuple(int(side) for side in start)
+        if rows < 1 or cols < 1:
+            raise ValueError("the board needs at least one row and one column")
+        if rows * cols > MAX_SQUARES:
+            raise ValueError(f"a {rows}x{cols} board is too big, the limit is {MAX_SQUARES} squares")
+        if len(start) != 2 or not (0 <= start[0] < rows and 0 <= start[1] < cols):
+            raise ValueError(f"start {list(start)} is not on the board")
+        if strategy is not None and strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {sorted(STRATEGIES)}")
+        self.counts['requests'] += 1
+
+        key = (rows, cols, start, bool(closed), strategy)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.counts['cached'] += 1
+            return self._answer(self.cache[key], began, cached=True, shared=False)
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        computation = self.in_flight.get(key)
+        shared = computation is not None and computation.covers(deadline, max_nodes)
+        if shared:
+            self.counts['shared'] += 1
+        else:
+            computation = self._start(key, deadline, max_nodes)
+
+        computation.waiters += 1
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            result = await asyncio.wait_for(asyncio.shield(computation.future), remaining)
+        except asyncio.TimeoutError:
+            result = {'status': 'timeout', 'tour': None, 'length': 0, 'nodes': 0}
+        finally:
+            computation.waiters -= 1
+            if computation.waiters == 0 and not computation.future.done():
+                self._abandon(key, computation)
+        return self._answer(result, began, cached=False, shared=shared)
+
+    def _start(self, key, deadline, max_nodes):
+        """send a solve to the pool"""
+        loop = asyncio.get_running_loop()
+        slot = self.free_slots.pop() if self.free_slots else None
+        if slot is not None:
+            self.flags[slot] = 0
+        # the solver stops a little before the deadline, so its partial
+        # path has time to come back before the wait gives up on it
+        timeout = None if deadline is None else max(0.0, deadline - loop.time()) * 0.9
+        self.pool, job = submit_job(self.pool, self._new_pool,
+                                    _solve, *key, timeout, max_nodes, slot)
+        computation = _Computation(job, slot, deadline, max_nodes)
+        self.in_flight[key] = computation
+        computation.future.add_done_callback(lambda future: self._finished(key, computation))
+        self.counts['computed'] += 1
+        return computation
+
+    def _abandon(self, key, computation):
+        """nobody wants this computation any more, stop it"""
+        self.counts['cancelled'] += 1
+        if self.in_flight.get(key) is computation:
+            del self.in_flight[key]
+        # never started, or started and told to stop at its next check
+        if not computation.job.cancel() and computation.slot is not None:
+            self.flags[computation.slot] = 1
+
+    def _finished(self, key, computation):
+        """a computation is over, keep its answer if it is final"""
+        if self.in_flight.get(key) is computation:
+            del self.in_flight[key]
+        if computation.slot is not None:
+            # only now, the worker may have been reading the flag until it finished
+            self.free_slots.append(computation.slot)
+        future = computation.future
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        if result['status'] in FINAL:
+            self.cache[key] = result
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    @staticmethod
+    def _answer(result, began, cached, shared):
+        answer = {
+            'status': result['status'],
+            'length': result['length'],
+            'nodes': result['nodes'],
+            'seconds': time.perf_counter() - began,
+            'cached': cached,
+            'shared': shared,
+        }
+        if result['tour'] is not None:
+            answer['tour'] = decode(result['tour'])
+        return answer
+
+    async def handle(self, reader, writer):
+        """answer the JSON line requests on one connection, several at once"""
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            request = {}
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request has to be a JSON object")
+                response = await self.solve(**{name: request[name] for name in
+                                               ('rows', 'cols', 'start', 'closed', 'timeout',
+                                                'max_nodes', 'strategy') if name in request})
+            except Exception as error:
+                # bad requests, and solves that failed in their worker
+                response = {'error': f"{type(error).__name__}: {error}"}
+            if 'id' in request:
+                response['id'] = request['id']
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            # the client has finished sending, answer what it already asked
+            await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            # the client went away, nobody will read these answers
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+
+async def serve(service, unix=None, host='127.0.0.1', port=8765):
+    """run the service on a unix socket, or TCP when unix is None"""
+    if unix is not None:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve knight's tour solves as JSON lines")
+    parser.add_argument('--unix', help="listen on this unix socket instead of TCP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--processes', '-p', type=int, help="worker processes (default: one per cpu)")
+    parser.add_argument('--cache-size', type=int, default=1024, help="answers kept for repeat requests")
+    args = parser.parse_args(argv)
+
+    service = SolverService(args.processes, args.cache_size)
+    try:
+        asyncio.run(serve(service, args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""solver_thread.py
+run a knight's tour solve on a worker thread so a gui stays responsive
+
+the worker never touches any widgets. it puts messages on a queue that the
+gui drains from its own event loop, e.g. with Tk's after:
+
+    ('progress', nodes, depth, best_depth, seconds)
+    ('done', result)     result is the SolveResult
+    ('error', exception)
+
+the knight's board belongs to the worker until 'done' or 'error' arrives.
+
+with watch=True the search also publishes every move and undo into a
+bounded ring buffer, and changes() folds whatever arrived since the last
+call into one diff of changed squares, so a gui can show the search live
+at its own frame rate. if the buffer fills up, events may have been lost
+and changes() resyncs from a snapshot of the board instead.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+
+class SolverThread:
+    def __init__(self, knight, closed=False, timeout=None, max_nodes=None, interval=0.1,
+                 watch=False, buffer_size=1 << 16):
+        """solve for knight from its start square, closed picks the tour type
+
+        timeout and max_nodes are the solve budgets, interval is the least
+        time in seconds between progress messages. watch turns on the event
+        buffer for changes(), holding up to buffer_size events
+        """
+        self.knight = knight
+        self.closed = closed
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.interval = interval
+        self.messages = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self._began = None
+        self._reported = None
+        self.cancelled = False
+        self.events = deque(maxlen=buffer_size) if watch else None
+        board = knight.board
+        # visited state per flat square as last handed out by changes()
+        self._visited = bytearray(board.rows * board.cols)
+        for x, y in board.moves:
+            self._visited[x * board.cols + y] = 1
+
+    def start(self):
+        """start solving"""
+        self._began = self._reported = time.perf_counter()
+        self.thread.start()
+
+    def cancel(self):
+        """ask the solve to stop, its result still arrives as 'done'
+
+        does nothing once the worker has finished, so a late cancel cannot
+        carry over to the knight's next solve
+        """
+        self.cancelled = True
+        if self.thread.is_alive():
+            self.knight.cancel()
+
+    def is_alive(self):
+        return self.thread.is_alive()
+
+    def poll(self):
+        """every message waiting on the queue, without blocking"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def changes(self):
+        """squares whose visited state changed since the last call
+
+        returns a list of (x, y, visited), one per square however many times
+        it changed in between. called from the gui thread while solving
+        """
+        events = self.events
+        board = self.knight.board
+        cols = board.cols
+        latest = {}
+        # only what is there now, the search keeps adding more. events are
+        # only lost when the search appends to a full buffer, which stays
+        # full until the next popleft, so checking before every popleft
+        # and once at the end catches every overflow
+        overflowed = False
+        for _ in range(len(events)):
+            if len(events) == events.maxlen:
+                overflowed = True
+                break
+            event = events.popleft()
+            if event >= 0:
+                latest[event] = 1
+            else:
+                latest[~event] = 0
+        else:
+            overflowed = len(events) == events.maxlen
+        if overflowed:
+            # events were lost, so rebuild everything from a snapshot.
+            # events that land after the clear are replayed next time, which
+            # is harmless as each one sets a square to a definite state
+            events.clear()
+            visited = bytearray(len(self._visited))
+            for x, y in list(board.moves):
+                visited[x * cols + y] = 1
+            latest = {}
+            for square, state in enumerate(visited):
+                if state != self._visited[square]:
+                    latest[square] = state
+
+        changed = []
+        for square, state in latest.items():
+            if self._visited[square] != state:
+                self._visited[square] = state
+                x, y = divmod(square, cols)
+                changed.append((x, y, bool(state)))
+        return changed
+
+    def _progress(self, nodes, depth, best_depth):
+        """called by the solver every few thousand nodes, on the worker"""
+        if self.cancelled:
+            # a cancel made before the solve started, which clears the flag
+            self.knight.cancel()
+        now = time.perf_counter()
+        if now - self._reported >= self.interval:
+            self._reported = now
+            self.messages.put(('progress', nodes, depth, best_depth, now - self._began))
+
+    def _run(self):
+        knight = self.knight
+        knight.progress = self._progress
+        knight.events = self.events
+        try:
+            if self.closed:
+                result = knight.solve_closed_tour(self.timeout, self.max_nodes)
+            else:
+                result = knight.solve(self.timeout, self.max_nodes)
+            self.messages.put(('done', result))
+        except Exception as error:
+            self.messages.put(('error', error))
+        finally:
+            knight.progress = None
+            knight.events = None
@@ -0,0 +1,94 @@
+"""symmetry.py
+the symmetries of an NxM board
+
+a knight's move stays a knight's move under every rotation and reflection
+of the board, so any search state or tour can be mapped onto its images.
+a tour already known can then answer a new start square without searching,
+either through those images or, for closed tours, by re-rooting the cycle.
+"""
+
+
+def symmetries(rows, cols):
+    """the transforms that map a rows x cols board onto itself
+
+    each transform is a function (x, y) -> (x, y). the identity comes first.
+    square boards have all 8 dihedral symmetries, rectangular ones only 4.
+    """
+    transforms = [
+        lambda x, y: (x, y),
+        lambda x, y: (rows - 1 - x, y),
+        lambda x, y: (x, cols - 1 - y),
+        lambda x, y: (rows - 1 - x, cols - 1 - y),
+    ]
+    if rows == cols:
+        transforms += [
+            lambda x, y: (y, x),
+            lambda x, y: (cols - 1 - y, rows - 1 - x),
+            lambda x, y: (y, rows - 1 - x),
+            lambda x, y: (cols - 1 - y, x),
+        ]
+    return transforms
+
+
+def reroot(tour, start):
+    """a closed tour rotated round its cycle so it begins at start"""
+    i = tour.index(start)
+    return tour[i:] + tour[:i]
+
+
+def derive_tour(tour, rows, cols, start):
+    """an open tour from start made by mapping a known open tour onto it
+
+    tour has to start or end on an image of start under the board's
+    symmetries, it is run backwards if it ends there. returns None if it
+    does neither
+    """
+    first, last = tour[0], tour[-1]
+    for transform in symmetries(rows, cols):
+        if transform(*first) == start:
+            return [transform(x, y) for x, y in tour]
+        if transform(*last) == start:
+            return [transform(x, y) for x, y in reversed(tour)]
+    return None
+
+
+def lookup(find, rows, cols, start, closed=False):
+    """a tour from start derived from whatever find turns up, in O(rows*cols)
+
+    find(square) returns a stored tour (or [] when there is known to be
+    none) filed under square, or None. closed tours cover every square, so
+    one filed under (0, 0) serves every start after re-rooting. open tours
+    are filed under both their ends and found through the images of start.
+    returns None if nothing usable is stored
+    """
+    if closed:
+        tour = find((0, 0))
+        return reroot(tour, start) if tour else tour
+    for transform in symmetries(rows, cols):
+        tour = find(transform(*start))
+        if tour is not None:
+            # no open tour from start means none from any of its images either
+            return derive_tour(tour, rows, cols, start) if tour else []
+    return None
+
+
+class TourLibrary:
+    def __init__(self):
+        """an in memory store of tours with the same get and put as
+        cache.SolutionCache, so it can be passed to Knight as its cache"""
+        self.tours = {}
+
+    def get(self, rows, cols, start, closed=False):
+        """a tour from start, [] if there is none, or None if it is unknown"""
+        return lookup(lambda square: self.tours.get((rows, cols, square, closed)),
+                      rows, cols, start, closed)
+
+    def put(self, rows, cols, start, closed, tour):
+        """store a tour, or an empty list to record that there is none"""
+        closed = bool(closed)
+        if closed:
+            self.tours.setdefault((rows, cols, (0, 0), closed), tour)
+            return
+        self.tours.setdefault((rows, cols, start, closed), tour)
+        if tour:
+            self.tours.setdefault((rows, cols, tour[-1], closed), tour)
@@ -0,0 +1,129 @@
+"""transposition.py
+a transposition table of dead search states for the knights tour solver
+
+a state is the set of visited squares plus the knight's square (and the
+start square for closed tours, and the end square when it is fixed). once
+the solver has exhausted a state without finding a tour, every later visit
+to the same state, or to any rotation or reflection of it, can be cut off
+straight away.
+
+states are stored as 128 bit zobrist hashes: every square has a random
+code, and the hash of a visited set is the xor of its squares' codes, so a
+move or an undo changes it with a single xor. one hash is kept per symmetry
+of the board (8 on a square board, 4 otherwise), each one the hash of the
+visited set seen through that symmetry, and a state's key is the smallest
+of them. the cost per node is a few xors per symmetry, whatever the size of
+the board.
+
+two states sharing a hash would wrongly cut off the search, with 128 bits
+the chance is around entries * lookups / 2**128, which is nothing next to
+any search this solver can finish. the table is bounded by memory and
+evicts the least recently used state when it is full.
+"""
+
+import random
+from collections import OrderedDict
+
+from symmetry import symmetries
+
+ENTRY_BYTES = 150  # a 128 bit key in an OrderedDict, about 135 under tracemalloc
+
+
+class TranspositionTable:
+    def __init__(self, rows, cols, max_bytes=64 << 20):
+        """create an empty table for a rows x cols board
+
+        max_bytes bounds the memory the stored states take, at about
+        ENTRY_BYTES each
+        """
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.max_bytes = max_bytes
+        self.max_entries = max(1, max_bytes // ENTRY_BYTES)
+        self.entries = OrderedDict()
+        self.hits = 0
+
+        # seeded so keys are the same from run to run
+        codes = random.Random(rows * 65536 + cols)
+        self._visited_codes = [codes.getrandbits(128) for _ in range(self.size)]
+        self._knight_codes = [codes.getrandbits(128) for _ in range(self.size)]
+        self._start_codes = [codes.getrandbits(128) for _ in range(self.size)]
+        self._end_codes = [codes.getrandbits(128) for _ in range(self.size)]
+
+        # for every symmetry, where each flat square index ends up
+        self._images = []
+        for transform in symmetries(rows, cols):
+            image = []
+            for x in range(rows):
+                for y in range(cols):
+                    new_x, new_y = transform(x, y)
+                    image.append(new_x * cols + new_y)
+            self._images.append(image)
+        # the visited set hashed through every symmetry, updated incrementally
+        self.hashes = [0] * len(self._images)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, board):
+        """take the visited set from a board, before a search starts"""
+        self.hashes = [0] * len(self._images)
+        for x in range(self.rows):
+            for y in range(self.cols):
+                if board.get_cell(x, y).visited:
+                    self.visit(x, y)
+
+    def visit(self, x, y):
+        """mark a square as visited, called as the knight moves"""
+        square = x * self.cols + y
+        codes = self._visited_codes
+        hashes = self.hashes
+        for i, image in enumerate(self._images):
+            hashes[i] ^= codes[image[square]]
+
+    # xor is its own inverse
+    unvisit = visit
+
+    def key(self, x, y, start=None, end=None):
+        """canonical integer key for the current visited set and knight square
+
+        start is the start square for closed tours and None for open ones,
+        end is the fixed final square if there is one. states that differ
+        in either never share a key
+        """
+        cols = self.cols
+        square = x * cols + y
+        knight_codes = self._knight_codes
+        start_codes = self._start_codes
+        end_codes = self._end_codes
+        best = None
+        for visited, image in zip(self.hashes, self._images):
+            key = visited ^ knight_codes[image[square]]
+            if start is not None:
+                key ^= start_codes[image[start[0] * cols + start[1]]]
+            if end is not None:
+                key ^= end_codes[image[end[0] * cols + end[1]]]
+            if best is None or key < best:
+                best = key
+        return best
+
+    def is_dead(self, key):
+        """check if a state is known to have no tour below it"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True
+        return False
+
+    def add_dead(self, key):
+        """record a state that has been searched without finding a tour"""
+        self.entries[key] = None
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """forget every stored state"""
+        self.entries.clear()
+        self.hits = 0